@@ -4,9 +4,10 @@ Enhanced version with additional features
 """
 
 import streamlit as st
+import streamlit.components.v1 as components
 import sys
 import os
-from datetime import datetime
+import json
 from dotenv import load_dotenv
 import time
 
@@ -25,8 +26,7 @@ st.set_page_config(
 )
 
 # Custom CSS for stunning premium UI
-st.markdown("""
-<style>
+CUSTOM_CSS = """
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap');
     
     /* Global Styles */
@@ -371,22 +371,79 @@ st.markdown("""
     .stat-card:hover {
         filter: drop-shadow(0 0 20px var(--glow));
     }
-</style>
-""", unsafe_allow_html=True)
+"""
+
+# Turns rendered live; older ones load a page at a time on request
+HISTORY_WINDOW = 10
 
 
 def initialize_session_state():
     """Initialize session state variables"""
     if 'agent' not in st.session_state:
         st.session_state.agent = None
-    if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []
     if 'initialized' not in st.session_state:
         st.session_state.initialized = False
     if 'total_questions' not in st.session_state:
         st.session_state.total_questions = 0
     if 'avg_response_time' not in st.session_state:
         st.session_state.avg_response_time = 0
+    if 'avg_first_token_time' not in st.session_state:
+        st.session_state.avg_first_token_time = 0
+    if 'history_window' not in st.session_state:
+        st.session_state.history_window = HISTORY_WINDOW
+    if 'last_render_ms' not in st.session_state:
+        st.session_state.last_render_ms = 0.0
+
+
+def inject_styles():
+    """Add the stylesheet to the page head once per session
+    
+    A <style> emitted with st.markdown is re-sent on every rerun; a style
+    element appended to the parent document survives reruns instead.
+    """
+    if st.session_state.get('styles_injected'):
+        return
+    components.html(f"""
+    <script>
+        const doc = window.parent.document;
+        if (!doc.getElementById("hr-assistant-styles")) {{
+            const style = doc.createElement("style");
+            style.id = "hr-assistant-styles";
+            style.textContent = {json.dumps(CUSTOM_CSS)};
+            doc.head.appendChild(style);
+        }}
+    </script>
+    """, height=0)
+    st.session_state.styles_injected = True
+
+
+@st.cache_resource
+def get_shared_agent() -> HRAssistantAgent:
+    """Build the agent once per process; every session shares its read-only state"""
+    load_dotenv()
+    llm = None
+    if os.getenv("HR_ASSISTANT_FAKE_LLM"):
+        # Local, offline LLM for testing streaming without an API key
+        from fake_backends import FakeStreamingLLM
+        llm = FakeStreamingLLM()
+    agent = HRAssistantAgent(llm=llm)
+    if os.getenv("HR_ASSISTANT_RETRIEVAL"):
+        # Answer questions outside the canned topics from the document index;
+        # imported here so demo mode needs no LangChain, Gemini or FAISS
+        from document_processor import DocumentProcessor
+        processor = DocumentProcessor()
+        agent.vectorstore = processor.process_and_store()
+        agent.lexical_index = processor.load_lexical_index()
+        agent.category_index = processor.load_category_index()
+        agent.fact_table = processor.load_fact_table()
+        if os.getenv("HR_ASSISTANT_RERANK"):
+            agent.reranker = processor.create_reranker(os.getenv("HR_ASSISTANT_RERANK"))
+        agent.intent_classifier = processor.load_intent_classifier(agent.intent_examples)
+        agent.index_version = processor.index_version
+        agent.source_versions = processor.source_versions
+        processor.rebuild_listeners.append(agent.on_index_rebuilt)
+    agent.initialize()
+    return agent
 
 
 def initialize_agent():
@@ -394,10 +451,8 @@ def initialize_agent():
     if not st.session_state.initialized:
         with st.spinner("Initializing HR Assistant Agent..."):
             try:
-                load_dotenv()
-                agent = HRAssistantAgent()
-                agent.initialize()
-                st.session_state.agent = agent
+                # Per-session view keeps chat history isolated between users
+                st.session_state.agent = get_shared_agent().for_session()
                 st.session_state.initialized = True
                 return True
             except Exception as e:
@@ -406,6 +461,13 @@ def initialize_agent():
     return True
 
 
+def get_chat_history():
+    """The session's chat history, kept once in the agent's history store"""
+    if st.session_state.agent is None:
+        return []
+    return st.session_state.agent.chat_history
+
+
 def display_header():
     """Display the header section"""
     st.markdown("""
@@ -416,17 +478,90 @@ def display_header():
     """, unsafe_allow_html=True)
 
 
-def display_chat_message(role: str, content: str):
-    """Display a chat message with animation"""
+def display_chat_message(role: str, content: str, target=None):
+    """Display a chat message with animation, optionally into a placeholder"""
+    target = target or st
     if role == "user":
-        st.markdown(f'<div class="user-message"><strong>You:</strong><br>{content}</div>', unsafe_allow_html=True)
+        target.markdown(f'<div class="user-message"><strong>You:</strong><br>{content}</div>', unsafe_allow_html=True)
     else:
-        st.markdown(f'<div class="assistant-message"><strong>HR Assistant:</strong><br>{content}</div>', unsafe_allow_html=True)
+        target.markdown(f'<div class="assistant-message"><strong>HR Assistant:</strong><br>{content}</div>', unsafe_allow_html=True)
+
+
+def update_running_mean(key: str, value: float):
+    """Fold one measurement into a running mean kept in session state"""
+    count = st.session_state.total_questions
+    st.session_state[key] = (st.session_state[key] * (count - 1) + value) / count
+
+
+def handle_question(question: str, category: str = None):
+    """Stream the answer into the chat view as it is generated"""
+    display_chat_message("user", question)
+    placeholder = st.empty()
+    display_chat_message("assistant", "Thinking...", placeholder)
+    
+    try:
+        answer = ""
+        result = None
+        for event in st.session_state.agent.ask_stream(question, category=category):
+            if event["type"] == "token":
+                answer += event["text"]
+                display_chat_message("assistant", answer + "▌", placeholder)
+            else:
+                result = event
+    except Exception as e:
+        st.error(f"Error: {str(e)}")
+        return
+    
+    # Update stats; first token and total time are tracked separately
+    st.session_state.total_questions += 1
+    update_running_mean("avg_first_token_time", result["time_to_first_token"])
+    update_running_mean("avg_response_time", result["response_time"])
+    
+    # Rerun to display new message
+    st.rerun()
+
+
+def display_chat_turn(chat: dict):
+    """Display a question and its answer as a single element"""
+    st.markdown(
+        f'<div class="user-message"><strong>You:</strong><br>{chat["question"]}</div>'
+        f'<div class="assistant-message"><strong>HR Assistant:</strong><br>{chat["answer"]}</div>',
+        unsafe_allow_html=True
+    )
+
+
+def get_visible_turns(history, window: int) -> list:
+    """The last ``window`` turns, reading spilled turns from disk if needed"""
+    turns = history.recent(window)
+    missing = window - len(turns)
+    if missing > 0 and history.spilled:
+        start = max(0, history.spilled - missing)
+        turns = history.load_spilled(offset=start, limit=history.spilled - start) + turns
+    return turns
+
+
+def display_chat_history():
+    """Render the latest turns; cost depends on the window, not history length"""
+    render_start = time.perf_counter()
+    history = get_chat_history()
+    window = st.session_state.history_window
+    
+    hidden = len(history) - window
+    if hidden > 0:
+        if st.button(f"Show earlier messages ({hidden} hidden)", use_container_width=True):
+            st.session_state.history_window += HISTORY_WINDOW
+            st.rerun()
+    
+    for chat in get_visible_turns(history, window):
+        display_chat_turn(chat)
+    
+    st.session_state.last_render_ms = (time.perf_counter() - render_start) * 1000
 
 
 def main():
     """Main application"""
     initialize_session_state()
+    inject_styles()
     
     # Display header
     display_header()
@@ -447,11 +582,31 @@ def main():
         with col2:
             st.markdown(f"""
             <div class="stat-card">
-                <p class="stat-number">{len(st.session_state.chat_history)}</p>
+                <p class="stat-number">{len(get_chat_history())}</p>
                 <p class="stat-label">Conversations</p>
             </div>
             """, unsafe_allow_html=True)
         
+        col3, col4 = st.columns(2)
+        with col3:
+            st.markdown(f"""
+            <div class="stat-card">
+                <p class="stat-number">{st.session_state.avg_first_token_time:.2f}s</p>
+                <p class="stat-label">First Token</p>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col4:
+            st.markdown(f"""
+            <div class="stat-card">
+                <p class="stat-number">{st.session_state.avg_response_time:.2f}s</p>
+                <p class="stat-label">Total Time</p>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        # Measured on the previous run; stays flat as the conversation grows
+        st.caption(f"History render: {st.session_state.last_render_ms:.1f} ms")
+        
         st.markdown("---")
         
         st.markdown("### Quick Questions")
@@ -479,12 +634,14 @@ def main():
                 for question in questions:
                     if st.button(question, key=question, use_container_width=True):
                         st.session_state.current_question = question
+                        # Retrieval only searches this category's documents
+                        st.session_state.current_category = category
         
         st.markdown("---")
         
         if st.button("Clear Chat History", use_container_width=True):
-            st.session_state.chat_history = []
             st.session_state.total_questions = 0
+            st.session_state.history_window = HISTORY_WINDOW
             if st.session_state.agent:
                 st.session_state.agent.clear_history()
             st.rerun()
@@ -523,42 +680,16 @@ def main():
         st.stop()
     
     # Display chat history
-    for chat in st.session_state.chat_history:
-        display_chat_message("user", chat["question"])
-        display_chat_message("assistant", chat["answer"])
+    display_chat_history()
     
     # Chat input
     # Handle quick question clicks from sidebar
     if 'current_question' in st.session_state:
         question = st.session_state.current_question
         del st.session_state.current_question
+        category = st.session_state.pop("current_category", None)
         # Process the question immediately
-        with st.spinner("Thinking..."):
-            start_time = time.time()
-            try:
-                result = st.session_state.agent.ask(question)
-                response_time = time.time() - start_time
-                
-                # Update stats
-                st.session_state.total_questions += 1
-                st.session_state.avg_response_time = (
-                    (st.session_state.avg_response_time * (st.session_state.total_questions - 1) + response_time) 
-                    / st.session_state.total_questions
-                )
-                
-                # Add to chat history
-                st.session_state.chat_history.append({
-                    "question": question,
-                    "answer": result["answer"],
-                    "timestamp": datetime.now(),
-                    "response_time": response_time
-                })
-                
-                # Rerun to display new message
-                st.rerun()
-                
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
+        handle_question(question, category)
     
     # Chat input section
     st.markdown("### Chat with HR Assistant")
@@ -570,35 +701,7 @@ def main():
     )
     
     if question:
-        # Show typing indicator
-        with st.spinner("Thinking..."):
-            start_time = time.time()
-            try:
-                result = st.session_state.agent.ask(question)
-                response_time = time.time() - start_time
-                
-                # Update stats
-                st.session_state.total_questions += 1
-                st.session_state.avg_response_time = (
-                    (st.session_state.avg_response_time * (st.session_state.total_questions - 1) + response_time) 
-                    / st.session_state.total_questions
-                )
-                
-                # Add to chat history
-                st.session_state.chat_history.append({
-                    "question": question,
-                    "answer": result["answer"],
-                    "timestamp": datetime.now(),
-                    "response_time": response_time
-                })
-                
-                # Rerun to display new message
-                st.rerun()
-                
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
-    
-
+        handle_question(question)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,51 @@
+"""
+Benchmark for chat history rendering in app.py
+Runs the Streamlit script headlessly with histories of increasing length and
+reports the per-rerun time, which should stay flat thanks to windowing
+
+Usage: python benchmarks/bench_chat_render.py
+"""
+
+import os
+import sys
+import time
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from streamlit.testing.v1 import AppTest
+from hr_agent import HRAssistantAgent
+
+
+APP_PATH = os.path.join(os.path.dirname(__file__), "..", "app.py")
+QUESTIONS = ["How many sick leaves do I have?", "What is the notice period?", "Tell me about provident fund"]
+
+
+def time_rerun(turns: int, repeat: int = 5):
+    """Median wall time of a rerun, and the app's own history render time"""
+    agent = HRAssistantAgent(history_size=turns or 1)
+    for i in range(turns):
+        agent.ask(QUESTIONS[i % len(QUESTIONS)])
+
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.session_state["agent"] = agent
+    at.session_state["initialized"] = True
+    at.run()
+    wall, render = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        at.run()
+        wall.append(time.perf_counter() - start)
+        render.append(at.session_state["last_render_ms"])
+    return statistics.median(wall) * 1000, statistics.median(render)
+
+
+def main():
+    print(f"{'turns':>6} {'rerun (ms)':>11} {'history render (ms)':>20}")
+    for turns in (10, 100, 1000):
+        wall_ms, render_ms = time_rerun(turns)
+        print(f"{turns:>6} {wall_ms:>11.1f} {render_ms:>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Recursive-window vs Markdown-section chunking
+Indexes data/ with each splitter and reports chunk count, duplicated text,
+on-disk index size, retrieval hit rate@k and how many chunks an answer
+needs (rank of the first chunk holding the answer)
+
+Usage: python benchmarks/bench_chunking.py [top k]
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_retrieval import DATA_DIR, QUESTIONS
+from document_processor import DocumentProcessor
+from fake_backends import HashingEmbeddings
+import mmap_store
+
+
+def evaluate(splitter: str, root: str, top_k: int):
+    processor = DocumentProcessor(data_dir=os.path.join(root, "data"),
+                                  persist_dir=os.path.join(root, f"index-{splitter}"),
+                                  embeddings=HashingEmbeddings(), cache_dir=None, splitter=splitter)
+    vectorstore = processor.process_and_store()
+    chunks = list(mmap_store.iter_documents(vectorstore))
+    source_chars = 0
+    for rel_path in processor.list_files():
+        with open(os.path.join(processor.data_dir, rel_path), "r", encoding="utf-8") as f:
+            source_chars += len(f.read())
+    index_bytes = sum(os.path.getsize(os.path.join(processor.persist_dir, name))
+                      for name in os.listdir(processor.persist_dir))
+
+    hits, ranks = 0, []
+    for question, expected in QUESTIONS:
+        results = vectorstore.similarity_search(question, k=top_k)
+        rank = next((i for i, doc in enumerate(results, 1) if expected in doc.page_content), None)
+        hits += rank is not None
+        ranks.append(rank or top_k + 1)
+    return {
+        "splitter": splitter,
+        "chunks": len(chunks),
+        "mean_chunk_chars": statistics.mean(len(doc.page_content) for doc in chunks),
+        "indexed_chars_per_source_char": sum(len(doc.page_content) for doc in chunks) / source_chars,
+        "index_bytes": index_bytes,
+        f"hit_rate@{top_k}": hits / len(QUESTIONS),
+        "mean_chunks_to_answer": statistics.mean(ranks),
+    }
+
+
+def main():
+    top_k = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    with tempfile.TemporaryDirectory() as root:
+        shutil.copytree(DATA_DIR, os.path.join(root, "data"))
+        for splitter in ("recursive", "markdown"):
+            print(json.dumps(evaluate(splitter, root, top_k)))
+
+
+if __name__ == "__main__":
+    main()
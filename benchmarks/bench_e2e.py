@@ -0,0 +1,254 @@
+"""
+End-to-end benchmark: question latency and ingestion throughput
+Replays a question corpus (sidebar quick questions, paraphrases, policy
+look-ups, off-topic) through HRAssistantAgent.ask over data/, with every
+retrieval stage the server enables, then times
+DocumentProcessor.process_and_store over synthetic corpora of increasing
+size. Embeddings (hashing) and the LLM (FakeStreamingLLM) are offline and
+deterministic, so two runs differ only by the code under test.
+
+Every measurement runs in its own process, so its peak RSS is its own. The
+report is one JSON document, meant to be saved per commit and diffed.
+
+Usage: python benchmarks/bench_e2e.py [--sizes 10,100,1000] [--repeats 20]
+                                      [--llm-delay-ms 0] [--output report.json]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import shutil
+import platform
+import argparse
+import tempfile
+import contextlib
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak RSS is not reported
+    resource = None
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_parallel_ingestion import make_corpus
+from bench_retrieval import DATA_DIR, QUESTIONS
+from document_processor import DocumentProcessor
+from fake_backends import FakeStreamingLLM, HashingEmbeddings
+from hr_agent import HRAssistantAgent
+
+
+# Category -> questions, replayed in this order on every pass
+CORPUS = {
+    # The Quick Questions sidebar of app.py
+    "quick": [
+        "How many sick leaves do I have?",
+        "What is the maternity leave policy?",
+        "Tell me about annual leave",
+        "What health insurance benefits do we get?",
+        "Tell me about provident fund",
+        "What bonuses do we get?",
+        "When are the company holidays?",
+        "What is the work from home policy?",
+        "What is the notice period?",
+    ],
+    "paraphrase": [
+        "how many sick days do i get",
+        "Maternity leave - how long is it?",
+        "whats the medical insurance cover",
+        "Can I carry leave over to next year?",
+        "how much notice do I need to give when I resign",
+        "Is there a bonus for referring friends?",
+        "Do we get reimbursed for the gym?",
+        "remote work - how many days a week?",
+    ],
+    "policy": [question for question, _ in QUESTIONS],
+    "off_topic": [
+        "hi",
+        "thanks!",
+        "Who won the football match?",
+        "Recommend a pizza place",
+        "What's the capital of France?",
+        "How do I fix a flat tyre?",
+    ],
+}
+
+
+# Must get the not-HR fallback, never policy text, whichever way they are routed
+NOT_HR = ["Who won the football match?", "What's the capital of France?", "Recommend a pizza place"]
+
+
+def check_not_hr(agent: HRAssistantAgent):
+    """NOT_HR questions, sync and async, answer with the not-HR fallback"""
+    fallback = agent._fallback_answer(is_hr_related=False)
+    for question in NOT_HR:
+        for result in (agent.ask(question), asyncio.run(agent.aask(question))):
+            assert result["answer"] == fallback and not result["source_documents"], \
+                f"{question!r} answered from HR policy: {result['answer'][:80]!r}"
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def latency_stats(samples: List[float], elapsed: float) -> Dict[str, Any]:
+    """Percentiles (ms) of per-call seconds, and calls per second of wall time"""
+    ms = np.asarray(samples) * 1000
+    return {
+        "count": len(samples),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "throughput_qps": round(len(samples) / elapsed, 1),
+    }
+
+
+def build_agent(root: str, llm_delay_ms: float) -> HRAssistantAgent:
+    """An agent over data/ wired the way server.build_server wires it"""
+    shutil.copytree(DATA_DIR, os.path.join(root, "data"))
+    processor = DocumentProcessor(data_dir=os.path.join(root, "data"), persist_dir=os.path.join(root, "index"),
+                                  embeddings=HashingEmbeddings(), cache_dir=None)
+    agent = HRAssistantAgent(
+        llm=FakeStreamingLLM(first_token_delay=llm_delay_ms / 1000, token_delay=0.0),
+        vectorstore=processor.process_and_store(),
+        lexical_index=processor.load_lexical_index(),
+        category_index=processor.load_category_index(),
+        fact_table=processor.load_fact_table(),
+        reranker=processor.create_reranker("lexical"),
+        semantic_cache=processor.create_semantic_cache(),
+        source_versions=processor.source_versions,
+    )
+    agent.intent_classifier = processor.load_intent_classifier(agent.intent_examples)
+    agent.index_version = processor.index_version
+    agent.initialize()
+    return agent
+
+
+def run_questions(repeats: int, llm_delay_ms: float) -> Dict[str, Any]:
+    """
+    Replay the corpus through ask
+
+    A cold pass clears the answer and semantic caches first, so every
+    question takes its full path; a warm pass replays it as is.
+    """
+    with tempfile.TemporaryDirectory() as root:
+        agent = build_agent(root, llm_delay_ms)
+        check_not_hr(agent)
+        check_not_hr(HRAssistantAgent())
+        result: Dict[str, Any] = {}
+        for mode in ("cold", "warm"):
+            samples: Dict[str, List[float]] = {category: [] for category in CORPUS}
+            started = time.perf_counter()
+            for _ in range(repeats):
+                if mode == "cold":
+                    agent.answer_cache.clear()
+                    agent.semantic_cache.clear()
+                for category, questions in CORPUS.items():
+                    for question in questions:
+                        asked = time.perf_counter()
+                        agent.ask(question)
+                        samples[category].append(time.perf_counter() - asked)
+            elapsed = time.perf_counter() - started
+            everything = [sample for category_samples in samples.values() for sample in category_samples]
+            result[mode] = {
+                "all": latency_stats(everything, elapsed),
+                **{category: latency_stats(category_samples, sum(category_samples))
+                   for category, category_samples in samples.items()},
+            }
+        result["llm_calls"] = agent.llm.calls
+        result["caches"] = agent.get_cache_stats()
+        result["peak_rss_mb"] = peak_rss_mb()
+        return result
+
+
+def run_ingestion(file_count: int) -> Dict[str, Any]:
+    """Time a full build, then a refresh with nothing changed, of a synthetic corpus"""
+    with tempfile.TemporaryDirectory() as root:
+        data_dir = os.path.join(root, "data")
+        make_corpus(data_dir, file_count)
+        corpus_bytes = sum(os.path.getsize(os.path.join(path, name))
+                           for path, _, names in os.walk(data_dir) for name in names)
+        processor = DocumentProcessor(data_dir=data_dir, persist_dir=os.path.join(root, "index"),
+                                      embeddings=HashingEmbeddings(), cache_dir=None)
+        # Includes hashing every chunk's tokens for its embedding, in Python
+        started = time.perf_counter()
+        vectorstore = processor.process_and_store()
+        build_s = time.perf_counter() - started
+        chunks = vectorstore.index.ntotal
+        started = time.perf_counter()
+        processor.process_and_store()
+        refresh_s = time.perf_counter() - started
+        return {
+            "files": file_count,
+            "corpus_mb": round(corpus_bytes / (1 << 20), 2),
+            "chunks": chunks,
+            "build_s": round(build_s, 3),
+            "build_files_per_s": round(file_count / build_s, 1),
+            "build_chunks_per_s": round(chunks / build_s, 1),
+            "build_mb_per_s": round(corpus_bytes / (1 << 20) / build_s, 2),
+            "refresh_unchanged_s": round(refresh_s, 3),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def _measure(fn: Callable[..., Dict[str, Any]], *args) -> Dict[str, Any]:
+    # Progress messages go to stderr; stdout carries only the report
+    with contextlib.redirect_stdout(sys.stderr):
+        return fn(*args)
+
+
+def isolated(fn: Callable[..., Dict[str, Any]], *args) -> Dict[str, Any]:
+    """Run a measurement in a fresh process, so peak RSS covers only it"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_measure, fn, *args).result()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end HR Assistant benchmark")
+    parser.add_argument("--sizes", default="10,100,1000", help="Synthetic corpus sizes, in files")
+    parser.add_argument("--repeats", type=int, default=20, help="Passes over the question corpus per mode")
+    parser.add_argument("--llm-delay-ms", type=float, default=0.0,
+                        help="Fake LLM time to first token; 0 measures the agent alone")
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {"repeats": args.repeats, "llm_delay_ms": args.llm_delay_ms,
+                   "questions": {category: len(questions) for category, questions in CORPUS.items()}},
+        "questions": isolated(run_questions, args.repeats, args.llm_delay_ms),
+        "ingestion": [isolated(run_ingestion, int(size)) for size in args.sizes.split(",")],
+    }
+    text = json.dumps(report, indent=2, sort_keys=True, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Fact table lookups vs retrieval
+Extracts the bulleted facts of data/, then answers the benchmark questions
+by fact lookup and by vector search (offline hashing embeddings): how many
+each answers with the expected text, and what a question costs. Table
+build and load time are reported too
+
+Usage: python benchmarks/bench_facts.py [repeats]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_retrieval import DATA_DIR, QUESTIONS
+from document_processor import DocumentProcessor
+from fact_table import FactTable
+from fake_backends import HashingEmbeddings
+
+
+def per_question_us(fn, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for question, _ in QUESTIONS:
+            fn(question)
+    return (time.perf_counter() - started) / (repeats * len(QUESTIONS)) * 1e6
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with tempfile.TemporaryDirectory() as root:
+        shutil.copytree(DATA_DIR, os.path.join(root, "data"))
+        processor = DocumentProcessor(data_dir=os.path.join(root, "data"), persist_dir=os.path.join(root, "index"),
+                                      embeddings=HashingEmbeddings(), cache_dir=None)
+        vectorstore = processor.process_and_store()
+        started = time.perf_counter()
+        fact_table = processor.build_fact_table()
+        build_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        FactTable.load(processor.persist_dir)
+        load_ms = (time.perf_counter() - started) * 1000
+
+        facts = [(question, expected, fact_table.lookup(question)) for question, expected in QUESTIONS]
+        wrong = [(question, fact.text()) for question, expected, fact in facts
+                 if fact is not None and expected not in fact.text()]
+        print(json.dumps({
+            "path": "facts",
+            "answered": sum(fact is not None for _, _, fact in facts),
+            "correct": sum(fact is not None and expected in fact.text() for _, expected, fact in facts),
+            "wrong": wrong,
+            "questions": len(QUESTIONS),
+            "lookup_us": round(per_question_us(fact_table.lookup, repeats), 1),
+            "facts": len(fact_table),
+            "topics": len(fact_table.topics),
+            "aliases": len(fact_table.aliases),
+            "build_ms": round(build_ms, 1),
+            "load_ms": round(load_ms, 2),
+        }))
+        # A question the table cannot answer falls through to retrieval; a wrong answer ships
+        assert not wrong, f"fact lookup answered wrongly: {wrong}"
+
+        top = [(expected, vectorstore.similarity_search(question, k=1)) for question, expected in QUESTIONS]
+        print(json.dumps({
+            "path": "retrieval@1",
+            "correct": sum(bool(docs) and expected in docs[0].page_content for expected, docs in top),
+            "questions": len(QUESTIONS),
+            "lookup_us": round(per_question_us(lambda q: vectorstore.similarity_search(q, k=1), repeats // 10 or 1), 1),
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+FAISS index types at scale
+Builds each index type over synthetic clustered vectors and reports build
+time, serialized index size, single-query p50/p99 latency and recall@k
+against exact Flat search
+
+Usage: python benchmarks/bench_index_types.py [--sizes 10000 100000 1000000]
+       [--dim 128] [--queries 500] [--k 10] [--types flat ivf_flat hnsw ivf_pq]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from index_factory import INDEX_TYPES, IndexSpec, build_index, factory_string
+
+
+def synthetic_vectors(n: int, dim: int, rng: np.random.Generator, clusters: int = 256) -> np.ndarray:
+    """Gaussian mixture, closer to real embeddings than uniform noise"""
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    points = centers[rng.integers(0, clusters, n)]
+    points += 0.35 * rng.standard_normal((n, dim)).astype(np.float32)
+    return points
+
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def evaluate(kind: str, corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int):
+    spec = IndexSpec(kind=kind)
+    start = time.perf_counter()
+    index = build_index(spec, corpus)
+    build_s = time.perf_counter() - start
+
+    latencies = []
+    found = np.empty_like(truth)
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, rows = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        found[i] = rows[0]
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    return {
+        "type": kind,
+        "factory": factory_string(spec, corpus.shape[1], len(corpus)),
+        "vectors": len(corpus),
+        "build_s": round(build_s, 2),
+        "index_mb": round(faiss.serialize_index(index).nbytes / 2**20, 1),
+        "p50_ms": percentile_ms(latencies, 50),
+        "p99_ms": percentile_ms(latencies, 99),
+        f"recall@{k}": round(float(recall), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        rng = np.random.default_rng(n)
+        corpus = synthetic_vectors(n, args.dim, rng)
+        # Held-out queries from the same mixture; ground truth from exact search
+        queries = corpus[rng.choice(n, args.queries, replace=False)]
+        queries = queries + 0.1 * rng.standard_normal(queries.shape).astype(np.float32)
+        exact = faiss.IndexFlatL2(args.dim)
+        exact.add(corpus)
+        _, truth = exact.search(queries, args.k)
+        del exact
+        for kind in args.types:
+            print(json.dumps(evaluate(kind, corpus, queries, truth, args.k)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
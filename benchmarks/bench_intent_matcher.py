@@ -0,0 +1,102 @@
+"""
+Micro-benchmark for intent routing
+Compares the old nested substring loops against the compiled IntentMatcher
+with 10, 100 and 1,000 registered intents
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from intent_matcher import IntentMatcher
+from response_catalog import ResponseCatalog, DEFAULT_CATALOG_PATH
+
+
+WORDS = [
+    "leave", "policy", "bonus", "salary", "holiday", "notice", "insurance", "remote",
+    "shift", "travel", "laptop", "referral", "gratuity", "payroll", "training", "appraisal",
+    "canteen", "parking", "badge", "visa", "relocation", "transport", "overtime", "claim",
+]
+
+
+# Question -> (tier, intent) the shipped catalog must route it to, or None
+SPOT_CHECKS = {
+    "hi": ("conversational", "greetings"),
+    "how many sick leaves do i have": ("topic", "sick leave"),
+    "when are the company holidays": ("topic", "holiday"),
+    "what bonuses do we get": ("topic", "bonus"),
+    # Word boundaries: no greeting inside "this"/"his", no "ok" inside "book"
+    "can my manager approve his leave?": ("hr_keyword", "hr_related"),
+    "is this covered": None,
+    "book a room": None,
+    "okes": None,
+}
+
+
+def spot_check():
+    """Route SPOT_CHECKS through the shipped catalog's matcher"""
+    matcher = ResponseCatalog.from_file(DEFAULT_CATALOG_PATH).matcher
+    for question, expected in SPOT_CHECKS.items():
+        hit = matcher.best(question)
+        routed = (hit.tier, hit.intent) if hit else None
+        assert routed == expected, f"{question!r} routed to {routed}, expected {expected}"
+
+
+def make_intents(count: int, rng: random.Random):
+    """Generate ``count`` synthetic intents with three unique patterns each"""
+    intents = {}
+    for i in range(count):
+        intents[f"intent_{i}"] = [
+            f"{rng.choice(WORDS)} {rng.choice(WORDS)} q{i}x{j}" for j in range(3)
+        ]
+    return intents
+
+
+def naive_route(question: str, intents):
+    """The pre-index routing: nested loops with substring checks"""
+    for intent, patterns in intents.items():
+        for pattern in patterns:
+            if pattern in question:
+                return intent
+    return None
+
+
+def time_per_call(fn, questions, repeat: int = 5) -> float:
+    """Best-of-``repeat`` mean latency per call, in microseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for question in questions:
+            fn(question)
+        best = min(best, (time.perf_counter() - start) / len(questions))
+    return best * 1e6
+
+
+def main():
+    spot_check()
+    rng = random.Random(42)
+    print(f"{'intents':>8} {'naive (us)':>12} {'matcher (us)':>14} {'speedup':>9}")
+    for count in (10, 100, 1000):
+        intents = make_intents(count, rng)
+        matcher = IntentMatcher()
+        matcher.add_tier("topic", intents)
+        matcher.compile()
+
+        all_patterns = [p for patterns in intents.values() for p in patterns]
+        questions = []
+        for _ in range(500):
+            words = [rng.choice(WORDS) for _ in range(12)]
+            if rng.random() < 0.5:
+                words.insert(rng.randrange(len(words)), rng.choice(all_patterns))
+            questions.append(" ".join(words))
+
+        naive_us = time_per_call(lambda q: naive_route(q, intents), questions)
+        matcher_us = time_per_call(matcher.best, questions)
+        print(f"{count:>8} {naive_us:>12.2f} {matcher_us:>14.2f} {naive_us / matcher_us:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
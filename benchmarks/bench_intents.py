@@ -0,0 +1,107 @@
+"""
+Keyword routing vs the TF-IDF intent classifier
+Routes labeled questions with the agent's keyword matcher and with the
+centroid classifier (trained on the agent's intents and data/ sections),
+and reports routing accuracy and per-question cost, classifying one at a
+time and as one batch
+
+Usage: python benchmarks/bench_intents.py [repeats]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_retrieval import DATA_DIR, QUESTIONS
+from document_processor import DocumentProcessor
+from fake_backends import HashingEmbeddings
+from hr_agent import HRAssistantAgent
+
+
+# (question, expected route): a canned reply "tier:intent", "hr" for a
+# retrieval answer, or "not_hr"
+LABELED = [(question, "hr") for question, _ in QUESTIONS] + [
+    ("hi", "conversational:greetings"),
+    ("hello there", "conversational:greetings"),
+    ("thanks a lot", "conversational:gratitude"),
+    ("bye!", "conversational:farewell"),
+    ("how are you?", "conversational:how_are_you"),
+    ("what can you do?", "conversational:about"),
+    ("ok", "conversational:acknowledgment"),
+    ("How many sick leaves do I have?", "topic:sick leave"),
+    ("What is the maternity leave policy?", "topic:maternity"),
+    ("Tell me about health insurance", "topic:health insurance"),
+    ("What's the notice period?", "topic:notice period"),
+    ("Can I work from home?", "topic:work from home"),
+    ("What are the company holidays?", "topic:holiday"),
+    ("When are bonuses paid?", "topic:bonus"),
+    ("How many casual leaves?", "topic:casual leave"),
+    ("How many days of annual leave?", "topic:annual leave"),
+    ("paternity leave for fathers?", "topic:paternity"),
+    ("How much PF does the company contribute?", "topic:provident fund"),
+    ("What is the dress code?", "hr"),
+    ("What is the probation period?", "hr"),
+    ("Who won the football match?", "not_hr"),
+    ("Recommend a pizza place", "not_hr"),
+    ("What's the capital of France?", "not_hr"),
+]
+
+
+def route_label(hit) -> str:
+    if hit is None:
+        return "not_hr"
+    if hit.tier in ("conversational", "topic"):
+        return f"{hit.tier}:{hit.intent}"
+    return "hr"
+
+
+def per_question_us(fn, questions, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn(questions)
+    return (time.perf_counter() - started) / (repeats * len(questions)) * 1e6
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    questions = [question for question, _ in LABELED]
+    with tempfile.TemporaryDirectory() as root:
+        shutil.copytree(DATA_DIR, os.path.join(root, "data"))
+        processor = DocumentProcessor(data_dir=os.path.join(root, "data"), persist_dir=os.path.join(root, "index"),
+                                      embeddings=HashingEmbeddings(), cache_dir=None)
+        processor.process_and_store()
+        agent = HRAssistantAgent()
+        started = time.perf_counter()
+        classifier = processor.load_intent_classifier(agent.intent_examples)
+        build_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        classifier = processor.load_intent_classifier(agent.intent_examples)
+        load_ms = (time.perf_counter() - started) * 1000
+
+        for router in ("keyword", "classifier"):
+            agent.intent_classifier = classifier if router == "classifier" else None
+            routes = [route_label(agent._route(question)) for question in questions]
+            wrong = [(q, expected, got) for (q, expected), got in zip(LABELED, routes) if expected != got]
+            result = {
+                "router": router,
+                "accuracy": round(1 - len(wrong) / len(LABELED), 3),
+                "route_us": round(per_question_us(lambda qs: [agent._route(q) for q in qs], questions, repeats), 1),
+                "misrouted": wrong,
+            }
+            if router == "classifier":
+                result.update({
+                    "classify_batch_us": round(per_question_us(classifier.classify_batch, questions, repeats), 1),
+                    "intents": len(classifier.labels),
+                    "build_ms": round(build_ms, 1),
+                    "load_ms": round(load_ms, 2),
+                })
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
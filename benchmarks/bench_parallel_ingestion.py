@@ -0,0 +1,101 @@
+"""
+Benchmark for process-parallel document loading and splitting
+Splits a synthetic 10k-file corpus with 1..N worker processes and reports
+the speedup over the single-process path, then checks that indexing a
+slice of it with an embedder of random latency saves the same ids.json
+for every worker count
+"""
+
+import os
+import sys
+import time
+import json
+import random
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from document_processor import DocumentProcessor
+import mmap_store
+
+
+SECTIONS = ["Annual Leave", "Sick Leave", "Health Insurance", "Provident Fund", "Notice Period",
+            "Referral Bonus", "Travel Policy", "Remote Work", "Overtime", "Gratuity"]
+
+
+def make_corpus(root: str, file_count: int, seed: int = 7):
+    """Write ``file_count`` policy-like text files of roughly 4 KB each"""
+    rng = random.Random(seed)
+    words = "employee policy leave days salary manager approval benefit year month".split()
+    for i in range(file_count):
+        unit_dir = os.path.join(root, f"unit_{i % 50:02d}")
+        os.makedirs(unit_dir, exist_ok=True)
+        lines = [f"# Handbook {i}"]
+        for section in rng.sample(SECTIONS, 4):
+            lines.append(f"\n### {section}")
+            for _ in range(8):
+                lines.append("- " + " ".join(rng.choice(words) for _ in range(14)))
+        with open(os.path.join(unit_dir, f"policy_{i:05d}.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+
+
+def time_split(data_dir: str, workers: int):
+    """Load and split every file; returns (seconds, chunk IDs in order)"""
+    processor = DocumentProcessor(data_dir=data_dir, embeddings=DeterministicFakeEmbedding(size=8),
+                                  cache_dir=None, load_workers=workers)
+    files = {rel_path: processor.file_hash(rel_path) for rel_path in processor.list_files()}
+    start = time.perf_counter()
+    ids = [chunk_id for _, chunk_id in processor.iter_file_chunks(files, {})]
+    return time.perf_counter() - start, ids
+
+
+class JitteryEmbedding(DeterministicFakeEmbedding):
+    """Fake embeddings whose calls finish out of order"""
+
+    def embed_documents(self, texts):
+        time.sleep(random.uniform(0, 0.01))
+        return super().embed_documents(texts)
+
+
+def saved_ids(data_dir: str, persist_dir: str, workers: int):
+    """Index the corpus with small, randomly slow batches; returns the saved row order"""
+    processor = DocumentProcessor(data_dir=data_dir, persist_dir=persist_dir, embeddings=JitteryEmbedding(size=8),
+                                  cache_dir=None, load_workers=workers, batch_size=2,
+                                  max_workers=8, requests_per_second=10_000)
+    processor.build_vector_store()
+    with open(os.path.join(persist_dir, mmap_store.IDS_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+    with tempfile.TemporaryDirectory() as data_dir:
+        make_corpus(data_dir, file_count)
+        print(f"{file_count} files, {cores} cores")
+        print(f"{'workers':>8} {'seconds':>9} {'files/s':>9} {'speedup':>8}")
+        baseline, baseline_ids = None, None
+        for workers in worker_counts:
+            seconds, ids = time_split(data_dir, workers)
+            if baseline is None:
+                baseline, baseline_ids = seconds, ids
+            assert ids == baseline_ids, "chunk order must not depend on worker count"
+            print(f"{workers:>8} {seconds:>9.2f} {file_count / seconds:>9.0f} {baseline / seconds:>7.2f}x")
+
+    # Batches embed concurrently and finish out of order; rows must not
+    with tempfile.TemporaryDirectory() as root:
+        data_dir = os.path.join(root, "data")
+        make_corpus(data_dir, min(file_count, 200))
+        baseline_ids = None
+        for workers in worker_counts:
+            ids = saved_ids(data_dir, os.path.join(root, f"index-{workers}"), workers)
+            if baseline_ids is None:
+                baseline_ids = ids
+            assert ids == baseline_ids, "ids.json order must not depend on embedding or worker timing"
+        print(f"ids.json identical across worker counts ({len(baseline_ids)} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Reranking after vector search
+Indexes data/ with offline hashing embeddings and, for each splitter,
+compares raw vector order against over-fetching top_k * depth candidates
+and reranking them: hit rate@k, mean reciprocal rank of the first chunk
+holding the answer, reranker cost and rank-change statistics. A last run
+sets a latency budget below the search cost to show reranking being skipped
+
+Usage: python benchmarks/bench_rerank.py [top k] [depth]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_retrieval import DATA_DIR, QUESTIONS
+from document_processor import DocumentProcessor
+from fake_backends import HashingEmbeddings
+
+
+def evaluate(vectorstore, stage, top_k: int):
+    hits, reciprocal_ranks, search_ms = 0, [], []
+    for question, expected in QUESTIONS:
+        started = time.perf_counter()
+        if stage is None:
+            results = vectorstore.similarity_search(question, k=top_k)
+        else:
+            candidates = vectorstore.similarity_search(question, k=top_k * stage.depth)
+            results = stage.rerank(question, candidates, top_k, elapsed=time.perf_counter() - started)
+        search_ms.append((time.perf_counter() - started) * 1000)
+        rank = next((i for i, doc in enumerate(results, 1) if expected in doc.page_content), None)
+        hits += rank is not None
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+    return {
+        f"hit_rate@{top_k}": hits / len(QUESTIONS),
+        "mrr": round(statistics.mean(reciprocal_ranks), 3),
+        "mean_retrieval_ms": round(statistics.mean(search_ms), 3),
+    }
+
+
+def main():
+    top_k = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as root:
+        shutil.copytree(DATA_DIR, os.path.join(root, "data"))
+        for splitter in ("recursive", "markdown"):
+            processor = DocumentProcessor(data_dir=os.path.join(root, "data"),
+                                          persist_dir=os.path.join(root, f"index-{splitter}"),
+                                          embeddings=HashingEmbeddings(), cache_dir=None, splitter=splitter)
+            vectorstore = processor.process_and_store()
+            print(json.dumps({"splitter": splitter, "reranker": None, **evaluate(vectorstore, None, top_k)}))
+
+            stage = processor.create_reranker("lexical", depth=depth)
+            result = evaluate(vectorstore, stage, top_k)
+            print(json.dumps({"splitter": splitter, "reranker": "lexical", **result, **stage.stats()}))
+
+            # Budget below the search cost: every query skips the reranker
+            stage = processor.create_reranker("lexical", depth=depth, budget_ms=0.01)
+            result = evaluate(vectorstore, stage, top_k)
+            print(json.dumps({"splitter": splitter, "reranker": "lexical (budget 0.01 ms)",
+                              **result, **stage.stats()}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Top-k sweep for the retrieval answering path
+Indexes data/ with offline hashing embeddings, asks questions whose answer
+text is known, and reports hit rate, answer size, per-stage latency and the
+share of questions that needed an embedding call, for vector-only and
+hybrid (BM25 + vector) retrieval at each k
+
+Usage: python benchmarks/bench_retrieval.py [k ...]
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from document_processor import DocumentProcessor
+from fake_backends import HashingEmbeddings
+from hr_agent import HRAssistantAgent
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+# (question, text the retrieved chunks must contain); none of them hit a
+# canned topic, so every one goes through retrieval
+QUESTIONS = [
+    ("Who needs to approve overtime?", "pre-approved by manager"),
+    ("How is overtime paid?", "1.5x regular hourly rate"),
+    ("When do I become eligible for gratuity?", "After 5 years of service"),
+    ("What is the vesting period for stock options?", "4 years (25% per year)"),
+    ("How much do I get for referring a candidate?", "25,000 per successful referral"),
+    ("How many counseling sessions are free?", "6 free sessions per year"),
+    ("What are the standard working hours?", "9:00 AM to 6:00 PM"),
+    ("How much gym reimbursement can I claim?", "2,000 per month"),
+    ("How many unused leave days can be carried forward?", "maximum of 10 days"),
+    ("What is the lunch break time?", "1:00 PM to 2:00 PM"),
+    ("When is the performance payout made?", "April of following year"),
+    ("What is the employer PF contribution?", "Employer Contribution"),
+]
+
+
+def sweep(ks):
+    with tempfile.TemporaryDirectory() as root:
+        shutil.copytree(DATA_DIR, os.path.join(root, "data"))
+        processor = DocumentProcessor(data_dir=os.path.join(root, "data"), persist_dir=os.path.join(root, "index"),
+                                      embeddings=HashingEmbeddings(), cache_dir=None)
+        vectorstore = processor.process_and_store()
+        lexical_index = processor.load_lexical_index()
+        for mode in ("vector", "hybrid"):
+            for k in ks:
+                # Fresh agent per k so the answer cache does not short-circuit retrieval
+                agent = HRAssistantAgent(vectorstore=vectorstore, top_k=k,
+                                         lexical_index=lexical_index if mode == "hybrid" else None)
+                hits, embedded, sizes, stages = 0, 0, [], {}
+                for question, expected in QUESTIONS:
+                    response = agent.ask(question)
+                    hits += any(expected in doc.page_content for doc in response["source_documents"])
+                    embedded += "embed" in response["timings"]
+                    sizes.append(len(response["answer"]))
+                    for stage, seconds in response["timings"].items():
+                        stages.setdefault(stage, []).append(seconds * 1000)
+                print(json.dumps({
+                    "mode": mode,
+                    "top_k": k,
+                    "hit_rate": hits / len(QUESTIONS),
+                    "embedded_share": embedded / len(QUESTIONS),
+                    "mean_answer_chars": statistics.mean(sizes),
+                    **{f"{stage}_ms": statistics.mean(values) for stage, values in stages.items()},
+                }))
+
+
+if __name__ == "__main__":
+    sweep([int(k) for k in sys.argv[1:]] or [1, 2, 3, 4, 6, 8])
@@ -0,0 +1,97 @@
+"""
+Load test for the headless HTTP server with fake backends
+Opens keep-alive connections that fire questions concurrently and reports
+throughput, latency percentiles and embedding batch sizes, with and
+without the micro-batching window
+
+Usage: python benchmarks/bench_server.py [connections] [requests per connection]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from server import build_server
+
+
+# Questions outside the canned topics, so each one needs a query embedding
+QUESTIONS = [
+    "What is the policy on employee badge replacement?",
+    "How do I claim travel expenses for a training course?",
+    "Can I carry over unused leave to next year?",
+    "Who approves overtime for contract staff?",
+    "Is there a dress code for client visits?",
+]
+
+
+async def client(port: int, requests: int, conversation: int, latencies: list, statuses: dict):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for i in range(requests):
+        body = json.dumps({
+            "question": f"{QUESTIONS[i % len(QUESTIONS)]} (ref {conversation}-{i})",
+            "conversation_id": f"bench-{conversation}",
+        }).encode("utf-8")
+        start = time.perf_counter()
+        writer.write(b"POST /ask HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                     + f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b"\r\n":
+                break
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+    writer.close()
+
+
+async def run(window_ms: float, connections: int, requests: int, persist_dir: str):
+    server = build_server(fake=True, persist_dir=persist_dir, window_ms=window_ms)
+    # Isolate the embed/search path: no LLM latency, no semantic cache reuse
+    server.agent.llm = None
+    server.agent.semantic_cache.threshold = 2.0
+    listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    embeddings = server.batcher.embeddings
+    calls_before = embeddings.calls
+
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, requests, c, latencies, statuses) for c in range(connections)))
+    elapsed = time.perf_counter() - start
+    listener.close()
+
+    latencies.sort()
+    return {
+        "window_ms": window_ms,
+        "requests": len(latencies),
+        "statuses": statuses,
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "embedding_calls": embeddings.calls - calls_before,
+        "avg_batch_size": server.batcher.stats()["avg_batch_size"],
+    }
+
+
+def main():
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with tempfile.TemporaryDirectory() as root:
+        for window_ms in (0.0, 5.0):
+            result = asyncio.run(run(window_ms, connections, requests, os.path.join(root, "index")))
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Load test for per-session vs process-wide shared agent state
+Starts 50 concurrent sessions and reports memory growth and
+time-to-first-answer for each strategy
+
+Usage: python benchmarks/bench_sessions.py [sessions] [corpus files]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import threading
+import subprocess
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from document_processor import DocumentProcessor
+from hr_agent import HRAssistantAgent
+
+
+QUESTIONS = [
+    "How many sick leaves do I have?",
+    "What is the maternity leave policy?",
+    "What health insurance benefits do we get?",
+    "What is the notice period?",
+]
+
+
+def rss_mb() -> float:
+    """Resident set size of this process, in MB"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def make_processor(root: str) -> DocumentProcessor:
+    return DocumentProcessor(data_dir=os.path.join(root, "data"), persist_dir=os.path.join(root, "index"),
+                             embeddings=DeterministicFakeEmbedding(size=768), cache_dir=None)
+
+
+def build_fixture(root: str, file_count: int):
+    """Index a synthetic corpus once so both strategies load the same store"""
+    rng = random.Random(3)
+    words = "employee policy leave days salary manager approval benefit year month notice".split()
+    os.makedirs(os.path.join(root, "data"))
+    for i in range(file_count):
+        with open(os.path.join(root, "data", f"policy_{i:04d}.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(" ".join(rng.choice(words) for _ in range(15)) for _ in range(60)))
+    make_processor(root).process_and_store()
+
+
+def run_sessions(root: str, mode: str, sessions: int):
+    """Start ``sessions`` concurrent sessions and time each one's first answer"""
+    shared = {}
+    shared_lock = threading.Lock()
+    latencies = [0.0] * sessions
+    baseline = rss_mb()
+
+    def session(n: int):
+        start = time.perf_counter()
+        if mode == "per-session":
+            agent = HRAssistantAgent()
+            agent.initialize()
+            vectorstore = make_processor(root).load_vector_store(use_mmap=False)
+        else:
+            with shared_lock:
+                if not shared:
+                    shared["agent"] = HRAssistantAgent()
+                    shared["agent"].initialize()
+                    shared["vectorstore"] = make_processor(root).load_vector_store()
+            agent = shared["agent"].for_session()
+            vectorstore = shared["vectorstore"]
+        question = QUESTIONS[n % len(QUESTIONS)]
+        vectorstore.similarity_search(question, k=3)
+        agent.ask(question)
+        latencies[n] = time.perf_counter() - start
+        # Keep the session alive until every session has answered
+        barrier.wait()
+
+    barrier = threading.Barrier(sessions + 1)
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(sessions)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    memory = rss_mb() - baseline
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    print(json.dumps({
+        "mode": mode,
+        "sessions": sessions,
+        "rss_growth_mb": round(memory, 1),
+        "first_answer_p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "first_answer_max_ms": round(latencies[-1] * 1000, 1),
+    }))
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        _, _, root, mode, sessions = sys.argv
+        run_sessions(root, mode, int(sessions))
+        return
+
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    file_count = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    with tempfile.TemporaryDirectory() as root:
+        build_fixture(root, file_count)
+        # Each strategy runs in a fresh process so memory numbers don't mix
+        for mode in ("per-session", "shared"):
+            result = subprocess.run([sys.executable, __file__, "--worker", root, mode, str(sessions)],
+                                    capture_output=True, text=True, check=True)
+            print(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
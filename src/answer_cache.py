@@ -0,0 +1,97 @@
+"""
+Answer Cache for HR Assistant Agent
+Memoizes answers under a normalized question key with TTL and LRU eviction
+"""
+
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+STOPWORDS = frozenset("""
+a an the is are was were be been am do does did i me my we our you your it its
+of to in on for at by with about please can could would will shall should may
+tell what whats how when where which who whom there this that these those and or
+""".split())
+
+# Question words and modals: retrieval can ignore them, a cached answer cannot
+# ("When is Diwali?" is not "What is Diwali?")
+QUESTION_WORDS = frozenset("""
+what whats how when where which who whom can could would will shall should may
+""".split())
+
+_KEY_STOPWORDS = STOPWORDS - QUESTION_WORDS
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, strip punctuation and filler words, and collapse whitespace"""
+    words = _PUNCTUATION.sub(" ", question.lower()).split()
+    kept = [word for word in words if word not in _KEY_STOPWORDS]
+    # A question made only of stopwords still needs a distinct key
+    return " ".join(kept or words)
+
+
+class AnswerCache:
+    """Thread-safe LRU cache of answers with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(question: str, index_version: Any = None) -> Tuple[str, Any]:
+        """Cache key: the normalized question plus the document index version"""
+        return normalize_question(question), index_version
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry; counters are kept"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate metrics for the cache"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,121 @@
+"""
+Category Index for HR Assistant Agent
+Tags policy chunks with the sidebar's question categories and keeps a
+precomputed category -> FAISS row index, so a search can be restricted to
+one slice of the store
+"""
+
+import os
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from intent_matcher import IntentMatcher
+from index_factory import search_parameters
+
+
+CATEGORIES_FILE = "categories.json"
+
+# Same grouping as the Quick Questions sidebar in app.py
+CATEGORY_KEYWORDS: Dict[str, List[str]] = {
+    "Leave Policies": [
+        "leave", "sick", "maternity", "paternity", "parental", "sabbatical", "vacation", "absence",
+    ],
+    "Benefits": [
+        "benefit", "insurance", "provident fund", "pf", "gratuity", "esop", "stock option", "bonus",
+        "reimbursement", "allowance", "pension", "nps", "superannuation", "gym", "dental", "vision",
+        "mental health", "wellness", "meals", "childcare", "education assistance", "loan", "perks",
+        "mobile and internet", "relocation", "training budget", "certification", "conference",
+        "learning", "mentorship", "medical", "transportation", "rewards",
+    ],
+    "Work Policies": [
+        "working hours", "standard hours", "flexible working", "work from home", "remote work",
+        "overtime", "holiday", "conduct", "professional behavior", "dress code", "notice period",
+        "resignation", "exit", "grievance", "work-life balance",
+    ],
+}
+
+_MATCHER = IntentMatcher()
+_MATCHER.add_tier("category", CATEGORY_KEYWORDS, plurals=True)
+_MATCHER.compile()
+
+
+def match_categories(text: str) -> List[str]:
+    """Categories whose keywords occur in ``text``, in category order"""
+    found = {hit.intent for hit in _MATCHER.find_all(text)}
+    return [category for category in CATEGORY_KEYWORDS if category in found]
+
+
+def classify_question(question: str) -> Optional[str]:
+    """The question's category when its keywords point to exactly one"""
+    categories = match_categories(question)
+    return categories[0] if len(categories) == 1 else None
+
+
+def tag_chunks(chunks: List[Document]) -> List[Document]:
+    """
+    Add ``categories`` metadata to chunks, in place
+
+    Section headings below the document title decide when the splitter
+    recorded them (a "Benefits Guide" can still hold leave sections);
+    otherwise the chunk text does.
+    """
+    for chunk in chunks:
+        path = chunk.metadata.get("section", "").split(" > ")[1:]
+        headings = " \n ".join(path + chunk.metadata.get("headings", []))
+        chunk.metadata["categories"] = match_categories(headings) or match_categories(chunk.page_content)
+    return chunks
+
+
+class CategoryIndex:
+    """Category -> FAISS row numbers, with a reusable ID selector per category"""
+
+    def __init__(self, rows: Dict[str, np.ndarray]):
+        self.rows = rows
+        self._selectors = {category: faiss.IDSelectorBatch(category_rows)
+                           for category, category_rows in rows.items()}
+
+    @classmethod
+    def build(cls, documents: Iterable[Document]) -> "CategoryIndex":
+        """Index documents given in FAISS row order"""
+        rows: Dict[str, List[int]] = {category: [] for category in CATEGORY_KEYWORDS}
+        for row, doc in enumerate(documents):
+            for category in doc.metadata.get("categories", []):
+                rows.setdefault(category, []).append(row)
+        return cls({category: np.asarray(category_rows, dtype=np.int64)
+                    for category, category_rows in rows.items()})
+
+    def search(self, vectorstore: FAISS, embedding: List[float], category: str,
+               k: int) -> Optional[List[Tuple[Document, float]]]:
+        """
+        Nearest chunks within one category
+
+        Returns:
+            (chunk, L2 distance) pairs nearest first, or None if the category
+            has no chunks (search the whole store instead)
+        """
+        if not len(self.rows.get(category, ())):
+            return None
+        params = search_parameters(vectorstore.index, self._selectors[category])
+        distances, rows = vectorstore.index.search(np.asarray([embedding], dtype=np.float32), k, params=params)
+        return [(vectorstore.docstore.search(vectorstore.index_to_docstore_id[int(row)]), float(distance))
+                for row, distance in zip(rows[0], distances[0]) if row >= 0]
+
+    def save(self, persist_dir: str):
+        os.makedirs(persist_dir, exist_ok=True)
+        tmp_path = os.path.join(persist_dir, CATEGORIES_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({category: rows.tolist() for category, rows in self.rows.items()}, f)
+        os.replace(tmp_path, tmp_path[:-len(".tmp")])
+
+    @classmethod
+    def load(cls, persist_dir: str) -> Optional["CategoryIndex"]:
+        path = os.path.join(persist_dir, CATEGORIES_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return cls({category: np.asarray(rows, dtype=np.int64) for category, rows in json.load(f).items()})
@@ -0,0 +1,155 @@
+"""
+Chat History Store for HR Assistant Agent
+Bounded ring buffer of conversation turns with interned answers and
+optional spill-to-disk for older turns
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from itertools import islice
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+
+class AnswerInterner:
+    """Process-wide, reference-counted table of answer texts
+
+    Canned answers repeat across turns and sessions; each distinct text is
+    stored once and turns only keep its integer ID.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._texts: Dict[int, str] = {}
+        self._refs: Dict[int, int] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, text: str) -> int:
+        """Return the ID for ``text``, adding it if new"""
+        with self._lock:
+            answer_id = self._ids.get(text)
+            if answer_id is None:
+                answer_id = self._next_id
+                self._next_id += 1
+                self._ids[text] = answer_id
+                self._texts[answer_id] = text
+                self._refs[answer_id] = 0
+            self._refs[answer_id] += 1
+            return answer_id
+
+    def release(self, answer_id: int):
+        """Drop one reference, freeing the text when none are left"""
+        with self._lock:
+            self._refs[answer_id] -= 1
+            if self._refs[answer_id] == 0:
+                del self._refs[answer_id]
+                del self._ids[self._texts.pop(answer_id)]
+
+    def get(self, answer_id: int) -> str:
+        return self._texts[answer_id]
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+
+# Shared by every session in the process
+ANSWERS = AnswerInterner()
+
+# (question, answer ID, unix timestamp, response time in seconds)
+Turn = Tuple[str, int, float, Optional[float]]
+
+
+class ChatHistoryStore:
+    """Conversation history capped at ``max_turns`` live turns
+
+    When the buffer is full the oldest turn is appended to a JSON-lines file
+    under ``spill_dir`` (if given) or dropped.
+    """
+
+    def __init__(self, max_turns: int = 100, spill_dir: Optional[str] = None,
+                 session_id: Optional[str] = None, interner: AnswerInterner = ANSWERS):
+        if max_turns < 1:
+            raise ValueError(f"max_turns must be at least 1, got {max_turns}")
+        self.max_turns = max_turns
+        self.interner = interner
+        self.spill_path = None
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            session_id = session_id or f"{int(time.time() * 1000)}-{id(self):x}"
+            self.spill_path = os.path.join(spill_dir, f"history-{session_id}.jsonl")
+        self.spilled = 0
+        self._turns: "deque[Turn]" = deque()
+
+    def append(self, question: str, answer: str, response_time: Optional[float] = None,
+               timestamp: Optional[float] = None):
+        """Record a turn, spilling or dropping the oldest one when full"""
+        if len(self._turns) >= self.max_turns:
+            self._evict_oldest()
+        answer_id = self.interner.acquire(answer)
+        self._turns.append((question, answer_id, timestamp or time.time(), response_time))
+
+    def _evict_oldest(self):
+        turn = self._turns.popleft()
+        if self.spill_path:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(self._to_dict(turn), ensure_ascii=False) + "\n")
+            self.spilled += 1
+        self.interner.release(turn[1])
+
+    def _to_dict(self, turn: Turn) -> Dict[str, Any]:
+        question, answer_id, timestamp, response_time = turn
+        return {
+            "question": question,
+            "answer": self.interner.get(answer_id),
+            "timestamp": timestamp,
+            "response_time": response_time,
+        }
+
+    def recent(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The last ``n`` live turns (all of them if None), oldest first"""
+        if n is None:
+            turns = list(self._turns)
+        else:
+            # Walk back from the newest turn so cost follows n, not history length
+            turns = list(islice(reversed(self._turns), max(n, 0)))[::-1]
+        return [self._to_dict(turn) for turn in turns]
+
+    def load_spilled(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Read spilled turns from disk, oldest first"""
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return []
+        turns = []
+        with open(self.spill_path, "r", encoding="utf-8") as f:
+            for i, line in enumerate(f):
+                if i < offset:
+                    continue
+                if limit is not None and len(turns) >= limit:
+                    break
+                turns.append(json.loads(line))
+        return turns
+
+    def clear(self):
+        """Forget every turn, including spilled ones"""
+        while self._turns:
+            self.interner.release(self._turns.popleft()[1])
+        if self.spill_path and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+        self.spilled = 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self._to_dict(turn) for turn in list(self._turns))
+
+    def __len__(self) -> int:
+        """Total turns in the conversation, including spilled ones"""
+        return len(self._turns) + self.spilled
+
+    def __del__(self):
+        # Return interned answers so texts of closed sessions can be freed
+        try:
+            while self._turns:
+                self.interner.release(self._turns.popleft()[1])
+        except Exception:
+            pass
@@ -4,99 +4,486 @@ Handles loading and processing of HR documents into vector database
 """
 
 import os
-from typing import List
+import glob
+import json
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Dict, Any, Tuple, Optional, Iterable, Iterator, Callable, Union
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import TextLoader, DirectoryLoader
+from langchain_community.document_loaders import TextLoader
 from langchain_community.vectorstores import FAISS
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from embedding_cache import CachedEmbeddings
+from embedding_scheduler import EmbeddingScheduler
+from semantic_cache import SemanticCache
+from lexical_index import BM25Index
+from section_splitter import MarkdownSectionSplitter
+from category_index import CategoryIndex, tag_chunks
+from index_factory import IndexSpec, build_index, configure, index_kind, all_vectors
+from reranker import LexicalOverlapReranker, CrossEncoderReranker, RerankingStage
+from intent_classifier import IntentClassifier, Examples
+from fact_table import FactTable, extract_facts
+import mmap_store
+
+
+# Anything with split_documents(documents) -> chunks
+TextSplitter = Union[RecursiveCharacterTextSplitter, MarkdownSectionSplitter]
+
+
+def split_file(data_dir: str, rel_path: str, content_hash: str,
+               text_splitter: TextSplitter) -> Tuple[List[Document], List[str]]:
+    """Load and split a single file, returning chunks and their stable IDs"""
+    documents = TextLoader(os.path.join(data_dir, rel_path)).load()
+    chunks = tag_chunks(text_splitter.split_documents(documents))
+    for chunk in chunks:
+        chunk.metadata["source_file"] = rel_path
+    ids = [f"{rel_path}::{content_hash[:16]}::{i}" for i in range(len(chunks))]
+    return chunks, ids
+
+
+_worker_splitter = None
+
+
+def _init_split_worker(text_splitter: TextSplitter):
+    """Ship the splitter to each worker process once, not once per file"""
+    global _worker_splitter
+    _worker_splitter = text_splitter
+
+
+def _split_file_in_worker(data_dir: str, rel_path: str, content_hash: str) -> Tuple[List[Document], List[str]]:
+    return split_file(data_dir, rel_path, content_hash, _worker_splitter)
 
 
 class DocumentProcessor:
     """Processes HR documents and creates vector database"""
     
-    def __init__(self, data_dir: str = "data", persist_dir: str = "faiss_index", use_gemini: bool = True):
+    MANIFEST_FILE = "manifest.json"
+    
+    def __init__(self, data_dir: str = "data", persist_dir: str = "faiss_index", use_gemini: bool = True,
+                 embeddings: Optional[Embeddings] = None, cache_dir: Optional[str] = "embedding_cache",
+                 cache_size: int = 100_000, batch_size: int = 64, max_workers: int = 4,
+                 requests_per_second: float = 5.0, load_workers: int = 1, splitter: str = "markdown",
+                 index_type: str = "flat", index_params: Optional[Dict[str, Any]] = None):
         self.data_dir = data_dir
         self.persist_dir = persist_dir
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/embedding-001",
-            google_api_key=os.getenv("GOOGLE_API_KEY")
-        )
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""]
+        # More than one worker fans file reading and splitting out over processes
+        self.load_workers = load_workers
+        # Called with the new manifest version whenever the index changes
+        self.rebuild_listeners: List[Callable[[int], None]] = []
+        self.manifest_path = os.path.join(persist_dir, self.MANIFEST_FILE)
+        if embeddings is None:
+            embeddings = GoogleGenerativeAIEmbeddings(
+                model="models/embedding-001",
+                google_api_key=os.getenv("GOOGLE_API_KEY")
+            )
+        # Document and query embeddings both go through the on-disk cache
+        if cache_dir:
+            embeddings = CachedEmbeddings(embeddings, cache_dir=cache_dir, max_entries=cache_size)
+        self.embeddings = embeddings
+        self.scheduler = EmbeddingScheduler(
+            self.embeddings,
+            batch_size=batch_size,
+            max_workers=max_workers,
+            requests_per_second=requests_per_second
         )
+        # "markdown" keeps ##/### sections whole; "recursive" cuts fixed windows
+        self.splitter = splitter
+        if splitter == "markdown":
+            self.text_splitter = MarkdownSectionSplitter(chunk_size=1000, chunk_overlap=200)
+        elif splitter == "recursive":
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=1000,
+                chunk_overlap=200,
+                length_function=len,
+                separators=["\n\n", "\n", " ", ""]
+            )
+        else:
+            raise ValueError(f"Unknown splitter: {splitter}")
+        # FAISS index type: "flat" (exact), "ivf_flat", "hnsw" or "ivf_pq";
+        # index_params override IndexSpec fields such as nlist or nprobe
+        self.index_spec = IndexSpec.from_dict({"kind": index_type, **(index_params or {})})
         
+    def iter_documents(self) -> Iterator[Document]:
+        """Lazily load documents from the data directory, one file at a time"""
+        for rel_path in self.list_files():
+            yield from TextLoader(os.path.join(self.data_dir, rel_path)).lazy_load()
+    
     def load_documents(self) -> List[Document]:
         """Load all documents from data directory"""
-        loader = DirectoryLoader(
-            self.data_dir,
-            glob="**/*.txt",
-            loader_cls=TextLoader,
-            show_progress=True
-        )
-        documents = loader.load()
+        documents = list(self.iter_documents())
         print(f"Loaded {len(documents)} documents")
         return documents
     
     def split_documents(self, documents: List[Document]) -> List[Document]:
-        """Split documents into chunks"""
-        chunks = self.text_splitter.split_documents(documents)
+        """Split documents into chunks tagged with section and category metadata"""
+        chunks = tag_chunks(self.text_splitter.split_documents(documents))
         print(f"Split into {len(chunks)} chunks")
         return chunks
     
-    def create_vector_store(self, chunks: List[Document]) -> FAISS:
+    def iter_batches(self, chunk_stream: Iterable[Tuple[Document, Optional[str]]]
+                     ) -> Iterator[Tuple[Tuple[List[Document], List[Optional[str]]], List[str]]]:
+        """Group a stream of (chunk, id) pairs into embedding batches"""
+        chunks, ids = [], []
+        for chunk, chunk_id in chunk_stream:
+            chunks.append(chunk)
+            ids.append(chunk_id)
+            if len(chunks) == self.scheduler.batch_size:
+                yield (chunks, ids), [chunk.page_content for chunk in chunks]
+                chunks, ids = [], []
+        if chunks:
+            yield (chunks, ids), [chunk.page_content for chunk in chunks]
+    
+    def index_chunks(self, chunk_stream: Iterable[Tuple[Document, Optional[str]]],
+                     vectorstore: Optional[FAISS] = None) -> Tuple[Optional[FAISS], int]:
+        """
+        Stream chunks through the embedding scheduler into the index
+        
+        Chunks are pulled from ``chunk_stream`` only as batch slots free up,
+        so peak memory is bounded by the batch size and later files are
+        loaded while earlier batches are being embedded.
+        
+        Args:
+            chunk_stream: Iterable of (chunk, docstore ID or None)
+            vectorstore: Index to append to; a new one is created if None
+            
+        Returns:
+            The vector store holding the new vectors and the number added
+        """
+        added = 0
+        for (chunks, ids), vectors in self.scheduler.embed_stream(self.iter_batches(chunk_stream)):
+            text_embeddings = [(chunk.page_content, vector) for chunk, vector in zip(chunks, vectors)]
+            metadatas = [chunk.metadata for chunk in chunks]
+            batch_ids = ids if all(ids) else None
+            if vectorstore is None:
+                vectorstore = FAISS.from_embeddings(
+                    text_embeddings, self.embeddings, metadatas=metadatas, ids=batch_ids
+                )
+            else:
+                vectorstore.add_embeddings(text_embeddings, metadatas=metadatas, ids=batch_ids)
+            added += len(chunks)
+        return vectorstore, added
+    
+    def embed_chunks(self, chunks: List[Document], ids: Optional[List[str]] = None,
+                     vectorstore: Optional[FAISS] = None) -> Optional[FAISS]:
+        """Embed an in-memory list of chunks in concurrent, rate-limited batches"""
+        vectorstore, _ = self.index_chunks(zip(chunks, ids or repeat(None)), vectorstore)
+        return vectorstore
+    
+    def create_vector_store(self, chunks: List[Document], ids: Optional[List[str]] = None) -> FAISS:
         """Create and persist vector store"""
-        vectorstore = FAISS.from_documents(
-            documents=chunks,
-            embedding=self.embeddings
-        )
-        # Save to disk
-        vectorstore.save_local(self.persist_dir)
+        vectorstore = self.embed_chunks(chunks, ids)
+        # Save to disk, with the lexical index over the same chunks
+        self.save_indexes(vectorstore)
         print(f"Created vector store with {len(chunks)} chunks")
         return vectorstore
     
-    def load_vector_store(self) -> FAISS:
-        """Load existing vector store"""
-        if not os.path.exists(self.persist_dir):
+    def load_vector_store(self, use_mmap: bool = True) -> FAISS:
+        """
+        Load existing vector store
+        
+        Args:
+            use_mmap: Map the index and docstore read-only, so worker processes
+                share pages and start instantly; False loads a writable copy
+        """
+        if not mmap_store.has_vector_store(self.persist_dir):
             raise FileNotFoundError(f"Vector store not found at {self.persist_dir}")
         
-        vectorstore = FAISS.load_local(
-            self.persist_dir,
-            self.embeddings,
-            allow_dangerous_deserialization=True
-        )
+        vectorstore = mmap_store.load_vector_store(self.persist_dir, self.embeddings, use_mmap=use_mmap)
+        configure(vectorstore.index, self.index_spec)
         print("Loaded existing vector store")
         return vectorstore
     
-    def process_and_store(self) -> FAISS:
-        """Complete pipeline: load, split, and store documents"""
-        # Check if vector store already exists
-        if os.path.exists(self.persist_dir):
-            print("Vector store already exists. Loading...")
+    def save_indexes(self, vectorstore: FAISS):
+        """Persist the vector store plus BM25 and category indexes of its chunks, and the fact table"""
+        if self.index_spec.kind != "flat" and index_kind(vectorstore.index) == "flat":
+            # Vectors are streamed into a flat index; train the configured one on them
+            vectorstore.index = build_index(self.index_spec, all_vectors(vectorstore.index))
+        mmap_store.save_vector_store(vectorstore, self.persist_dir)
+        # One pass each over the chunks, so they are never copied into a list
+        BM25Index.build(mmap_store.iter_documents(vectorstore)).save(self.persist_dir)
+        CategoryIndex.build(mmap_store.iter_documents(vectorstore)).save(self.persist_dir)
+        self.build_fact_table().save(self.persist_dir)
+    
+    def load_lexical_index(self) -> BM25Index:
+        """
+        Load the BM25 index persisted next to the vector store
+        
+        Stores written before the lexical index existed get one built from
+        their chunks on first load.
+        """
+        lexical_index = BM25Index.load(self.persist_dir)
+        if lexical_index is None:
+            BM25Index.build(mmap_store.iter_documents(self.load_vector_store())).save(self.persist_dir)
+            lexical_index = BM25Index.load(self.persist_dir)
+        return lexical_index
+    
+    def load_category_index(self) -> CategoryIndex:
+        """Load the category -> chunk row index, building it for older stores"""
+        category_index = CategoryIndex.load(self.persist_dir)
+        if category_index is None:
+            category_index = CategoryIndex.build(mmap_store.iter_documents(self.load_vector_store()))
+            category_index.save(self.persist_dir)
+        return category_index
+    
+    def build_fact_table(self) -> FactTable:
+        """Extract the bulleted facts of every data file (not chunks: bullets must stay whole)"""
+        facts = []
+        for rel_path in self.list_files():
+            with open(os.path.join(self.data_dir, rel_path), "r", encoding="utf-8") as f:
+                facts.extend(extract_facts(f.read(), rel_path))
+        return FactTable.build(facts)
+    
+    def load_fact_table(self) -> FactTable:
+        """Load the topic -> attribute -> value fact table, building it for older stores"""
+        fact_table = FactTable.load(self.persist_dir)
+        if fact_table is None:
+            fact_table = self.build_fact_table()
+            fact_table.save(self.persist_dir)
+            print(f"Built fact table: {len(fact_table)} facts in {len(fact_table.topics)} topics")
+        return fact_table
+    
+    def index_matches_config(self) -> bool:
+        """Whether the persisted index was built with this splitter and index spec"""
+        manifest = self.load_manifest()
+        return (manifest.get("splitter", "recursive") == self.splitter
+                and IndexSpec.from_dict(manifest.get("index")).builds_like(self.index_spec))
+    
+    def list_files(self) -> List[str]:
+        """List document files in the data directory, relative to it"""
+        paths = glob.glob(os.path.join(self.data_dir, "**", "*.txt"), recursive=True)
+        return sorted(os.path.relpath(path, self.data_dir) for path in paths)
+    
+    def file_hash(self, rel_path: str) -> str:
+        """SHA-256 of a data file's content"""
+        digest = hashlib.sha256()
+        with open(os.path.join(self.data_dir, rel_path), "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def load_manifest(self) -> Dict[str, Any]:
+        """Load the manifest of indexed files, or an empty one"""
+        if not os.path.exists(self.manifest_path):
+            return {"version": 0, "files": {}}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    def save_manifest(self, manifest: Dict[str, Any]):
+        """Write the manifest next to the persisted index"""
+        os.makedirs(self.persist_dir, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+    
+    @property
+    def index_version(self) -> int:
+        """Version of the persisted index; bumped on every build or refresh"""
+        return self.load_manifest()["version"]
+    
+    def source_versions(self) -> Dict[str, str]:
+        """Content hash of every indexed file, keyed by path relative to data_dir"""
+        return {rel_path: entry["hash"] for rel_path, entry in self.load_manifest()["files"].items()}
+    
+    def create_semantic_cache(self, threshold: float = 0.92, max_entries: int = 512,
+                              embeddings: Optional[Embeddings] = None) -> SemanticCache:
+        """Semantic answer cache persisted next to the document index"""
+        return SemanticCache(
+            embeddings or self.embeddings,
+            threshold=threshold,
+            max_entries=max_entries,
+            persist_dir=os.path.join(self.persist_dir, "semantic_cache")
+        )
+    
+    def create_reranker(self, kind: str = "lexical", depth: int = 4,
+                        budget_ms: Optional[float] = None) -> RerankingStage:
+        """
+        Reranking stage for retrieval results
+        
+        Args:
+            kind: "lexical" (term overlap weighted by this index's BM25 IDF) or
+                "cross-encoder" (needs sentence-transformers)
+            depth: Candidates fetched per kept result
+            budget_ms: Skip reranking once a query has spent this long
+        """
+        if kind == "lexical":
+            reranker = LexicalOverlapReranker(self.load_lexical_index())
+        elif kind == "cross-encoder":
+            reranker = CrossEncoderReranker()
+        else:
+            raise ValueError(f"Unknown reranker: {kind}")
+        return RerankingStage(reranker, depth=depth, budget_ms=budget_ms)
+    
+    def load_intent_classifier(self, intent_examples: Callable[..., Examples]) -> IntentClassifier:
+        """
+        Intent classifier trained on an agent's intents and this corpus's sections
+        
+        Saved next to the index and reused until the intents or the documents
+        change, so startup only memory-maps the centroid matrix.
+        
+        Args:
+            intent_examples: HRAssistantAgent.intent_examples, called with the
+                (heading path, text) sections of every document
+        """
+        fingerprint = IntentClassifier.fingerprint_of(sorted(intent_examples().items()), self.source_versions())
+        classifier = IntentClassifier.load(self.persist_dir)
+        if classifier is not None and classifier.fingerprint == fingerprint:
+            return classifier
+        
+        splitter = MarkdownSectionSplitter()
+        sections = [section for doc in self.iter_documents()
+                    for section in splitter.split_sections(doc.page_content)]
+        classifier = IntentClassifier.build(intent_examples(sections), fingerprint=fingerprint)
+        classifier.save(self.persist_dir)
+        print(f"Built intent classifier: {len(classifier.labels)} intents from {len(sections)} sections")
+        return classifier
+    
+    def notify_rebuilt(self, version: int):
+        """Tell listeners (e.g. answer caches) that the index has changed"""
+        for listener in self.rebuild_listeners:
+            listener(version)
+    
+    def chunk_file(self, rel_path: str, content_hash: str) -> Tuple[List[Document], List[str]]:
+        """Load and split a single file, returning chunks and their stable IDs"""
+        return split_file(self.data_dir, rel_path, content_hash, self.text_splitter)
+    
+    def iter_split_files(self, files: Dict[str, str]) -> Iterator[Tuple[str, Tuple[List[Document], List[str]]]]:
+        """
+        Split files in path order, in worker processes when load_workers > 1
+        
+        Results are consumed in submission order, so chunk order (and the
+        index built from it) is identical across runs and worker counts. Only
+        a bounded window of files is in flight at once.
+        
+        Args:
+            files: Mapping of relative path to content hash
+        """
+        if self.load_workers <= 1:
+            for rel_path, content_hash in files.items():
+                yield rel_path, self.chunk_file(rel_path, content_hash)
+            return
+        
+        window = 4 * self.load_workers
+        items = iter(files.items())
+        with ProcessPoolExecutor(max_workers=self.load_workers, initializer=_init_split_worker,
+                                 initargs=(self.text_splitter,)) as pool:
+            pending = deque()
+            for rel_path, content_hash in items:
+                pending.append((rel_path, pool.submit(_split_file_in_worker, self.data_dir, rel_path, content_hash)))
+                if len(pending) >= window:
+                    rel_path, future = pending.popleft()
+                    yield rel_path, future.result()
+            while pending:
+                rel_path, future = pending.popleft()
+                yield rel_path, future.result()
+    
+    def iter_file_chunks(self, files: Dict[str, str],
+                         manifest_files: Dict[str, Any]) -> Iterator[Tuple[Document, str]]:
+        """
+        Lazily split files into (chunk, id) pairs, a bounded window of files at a time
+        
+        Args:
+            files: Mapping of relative path to content hash
+            manifest_files: Manifest entries, filled in as each file is split
+        """
+        for rel_path, (chunks, ids) in self.iter_split_files(files):
+            manifest_files[rel_path] = {"hash": files[rel_path], "chunk_ids": ids}
+            yield from zip(chunks, ids)
+    
+    def build_vector_store(self) -> FAISS:
+        """Embed every file from scratch and write a fresh manifest"""
+        manifest = {"version": self.load_manifest()["version"] + 1, "splitter": self.splitter,
+                    "index": self.index_spec.to_dict(), "files": {}}
+        files = {rel_path: self.file_hash(rel_path) for rel_path in self.list_files()}
+        
+        vectorstore, added = self.index_chunks(self.iter_file_chunks(files, manifest["files"]))
+        if vectorstore is None:
+            raise ValueError(f"No documents found in {self.data_dir}")
+        self.save_indexes(vectorstore)
+        self.save_manifest(manifest)
+        self.notify_rebuilt(manifest["version"])
+        print(f"Created vector store with {added} chunks from {len(files)} documents")
+        return vectorstore
+    
+    def refresh_vector_store(self) -> FAISS:
+        """
+        Bring the persisted index in line with the data directory
+        
+        Only new or edited files are re-split and re-embedded; vectors of
+        removed files are deleted and everything else is left untouched.
+        
+        Returns:
+            The updated vector store
+        """
+        manifest = self.load_manifest()
+        indexed = manifest["files"]
+        current = {rel_path: self.file_hash(rel_path) for rel_path in self.list_files()}
+        
+        changed = [p for p, h in current.items() if indexed.get(p, {}).get("hash") != h]
+        removed = [p for p in indexed if p not in current]
+        
+        if not changed and not removed:
+            print("Vector store is up to date")
             return self.load_vector_store()
         
-        # Process documents
-        print("Processing documents...")
-        documents = self.load_documents()
-        chunks = self.split_documents(documents)
-        vectorstore = self.create_vector_store(chunks)
+        vectorstore = self.load_vector_store(use_mmap=False)
+        stale_ids = [i for p in removed + changed for i in indexed.get(p, {}).get("chunk_ids", [])]
+        if stale_ids and index_kind(vectorstore.index) != "flat":
+            # Approximate indexes keep vector IDs on removal (HNSW cannot
+            # remove at all), so rebuild; the embedding cache makes this cheap
+            print("Rebuilding approximate index to drop changed documents...")
+            return self.build_vector_store()
+        if stale_ids:
+            vectorstore.delete(stale_ids)
+        for rel_path in removed:
+            del indexed[rel_path]
+        
+        changed_files = {rel_path: current[rel_path] for rel_path in changed}
+        _, added = self.index_chunks(self.iter_file_chunks(changed_files, indexed), vectorstore)
         
+        self.save_indexes(vectorstore)
+        manifest["version"] += 1
+        self.save_manifest(manifest)
+        self.notify_rebuilt(manifest["version"])
+        print(f"Refreshed vector store: {len(changed)} changed, {len(removed)} removed, "
+              f"{added} chunks embedded")
         return vectorstore
-
+    
+    def process_and_store(self) -> FAISS:
+        """Complete pipeline: load, split, and store documents"""
+        # An index with a manifest can be updated in place, unless its chunks
+        # came from a different splitter or it is of a different index type
+        if (mmap_store.has_vector_store(self.persist_dir) and os.path.exists(self.manifest_path)
+                and self.index_matches_config()):
+            print("Vector store already exists. Refreshing changed documents...")
+            return self.refresh_vector_store()
+        
+        # No index yet, one in an older (manifest-less or pickled) format, or
+        # one built with another splitter or index type
+        print("Processing documents...")
+        return self.build_vector_store()
 
 if __name__ == "__main__":
     # Test the document processor
     processor = DocumentProcessor()
     vectorstore = processor.process_and_store()
     
-    # Test retrieval
+    # Test retrieval: over-fetch, then let the reranker pick the top 3
     query = "How many sick leaves do I have?"
-    results = vectorstore.similarity_search(query, k=3)
+    reranker = processor.create_reranker()
+    candidates = vectorstore.similarity_search(query, k=3 * reranker.depth)
+    results = reranker.rerank(query, candidates, k=3)
     print(f"\nTest query: {query}")
     print(f"Found {len(results)} relevant chunks")
     for i, doc in enumerate(results, 1):
         print(f"\nChunk {i}:")
         print(doc.page_content[:200])
+    
+    print(f"\nReranker: {reranker.stats()}")
+    if isinstance(processor.embeddings, CachedEmbeddings):
+        print(f"\nEmbedding cache: {processor.embeddings.stats()}")
@@ -0,0 +1,338 @@
+"""
+Embedding Cache for HR Assistant Agent
+Content-addressed, size-bounded on-disk cache in front of an embedding model
+"""
+
+import os
+import json
+import atexit
+import hashlib
+import inspect
+import weakref
+import threading
+import contextlib
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Iterator
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, one writer per cache directory
+    fcntl = None
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    Embed several questions as queries, in one call where the model allows it
+
+    ``embed_documents`` would embed them as documents, which models with a
+    task type (Gemini's RETRIEVAL_QUERY vs RETRIEVAL_DOCUMENT) embed
+    differently. Models without an ``embed_queries`` hook or a task type
+    get one ``embed_query`` call per text.
+    """
+    if hasattr(embeddings, "embed_queries"):
+        return embeddings.embed_queries(texts)
+    if "task_type" in inspect.signature(embeddings.embed_documents).parameters:
+        return embeddings.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+    return [embeddings.embed_query(text) for text in texts]
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an embedding model with a memory-mapped LRU vector cache
+
+    Vectors live in a float32 matrix file opened with ``np.memmap``, next to
+    a tag per row (the first 8 bytes of the key stored there). The mapping
+    of ``sha256(model, text)`` to a row is a JSON snapshot plus an
+    append-only log of the rows assigned since. When the cache is full the
+    least recently used row is overwritten.
+
+    New vectors are buffered in memory and written by ``flush``, which runs
+    ``flush_interval`` seconds after the first buffered miss, once
+    ``flush_size`` misses are buffered, and at exit; a miss never rewrites
+    the index. Processes sharing the directory (the app and the server)
+    take a lock file to write, replaying each other's log entries first,
+    and a row whose tag no longer matches is treated as a miss.
+    """
+
+    INDEX_FILE = "index.json"
+    LOG_FILE = "index.log"
+    VECTORS_FILE = "vectors.f32"
+    TAGS_FILE = "tags.u64"
+    LOCK_FILE = "cache.lock"
+
+    def __init__(self, embeddings: Embeddings, cache_dir: str = "embedding_cache",
+                 max_entries: int = 100_000, model_name: Optional[str] = None,
+                 flush_interval: float = 5.0, flush_size: int = 256):
+        self.embeddings = embeddings
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.model_name = model_name or getattr(embeddings, "model", type(embeddings).__name__)
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._rows: "OrderedDict[str, int]" = OrderedDict()
+        # Row -> key, to drop a key whose row was given to another
+        self._owners: Dict[int, str] = {}
+        # Vectors embedded but not yet written, by key
+        self._pending: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._dim: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self._tags: Optional[np.memmap] = None
+        # Snapshot (inode, mtime) and log position already applied
+        self._snapshot_id = None
+        self._log_offset = 0
+        self._log_entries = 0
+        self._timer: Optional[threading.Timer] = None
+        self._load()
+        atexit.register(_flush_at_exit, weakref.ref(self))
+
+    def _key(self, text: str) -> str:
+        """Cache key for a text under the wrapped model"""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _tag(key: str) -> int:
+        return int(key[:16], 16)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, name)
+
+    @contextlib.contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock on the cache directory, across processes"""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self._path(self.LOCK_FILE), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load(self):
+        """Open an existing cache if it was written for the same model and size"""
+        if not os.path.exists(self._path(self.INDEX_FILE)):
+            return
+        with self._file_lock():
+            with open(self._path(self.INDEX_FILE), "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("model") != self.model_name or index.get("capacity") != self.max_entries \
+                    or not os.path.exists(self._path(self.TAGS_FILE)):
+                print("Embedding cache belongs to another model or size, starting empty")
+                for name in (self.INDEX_FILE, self.LOG_FILE, self.VECTORS_FILE, self.TAGS_FILE):
+                    if os.path.exists(self._path(name)):
+                        os.remove(self._path(name))
+                return
+            self._catch_up()
+
+    def _open_files(self, mode: str):
+        self._vectors = np.memmap(self._path(self.VECTORS_FILE), dtype=np.float32,
+                                  mode=mode, shape=(self.max_entries, self._dim))
+        self._tags = np.memmap(self._path(self.TAGS_FILE), dtype=np.uint64, mode=mode, shape=(self.max_entries,))
+
+    def _assign(self, key: str, row: int):
+        """Record key -> row, forgetting whatever the row or the key held before"""
+        previous_owner = self._owners.get(row)
+        if previous_owner is not None and previous_owner != key:
+            del self._rows[previous_owner]
+        previous_row = self._rows.get(key)
+        if previous_row is not None and previous_row != row:
+            del self._owners[previous_row]
+        self._rows[key] = row
+        self._rows.move_to_end(key)
+        self._owners[row] = key
+
+    def _catch_up(self):
+        """Apply the snapshot (when it changed) and log entries other writers added; needs the file lock"""
+        stat = os.stat(self._path(self.INDEX_FILE))
+        snapshot_id = (stat.st_ino, stat.st_mtime_ns)
+        if snapshot_id != self._snapshot_id:
+            with open(self._path(self.INDEX_FILE), "r", encoding="utf-8") as f:
+                index = json.load(f)
+            self._rows, self._owners = OrderedDict(), {}
+            for key, row in index["rows"]:
+                self._assign(key, row)
+            self._snapshot_id = snapshot_id
+            self._log_offset = self._log_entries = 0
+            if self._vectors is None:
+                self._dim = index["dim"]
+                self._open_files("r+")
+        if not os.path.exists(self._path(self.LOG_FILE)):
+            return
+        with open(self._path(self.LOG_FILE), "rb") as f:
+            f.seek(self._log_offset)
+            data = f.read()
+        # A line is only complete once its newline is written
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            key, row = json.loads(line)
+            self._assign(key, row)
+            self._log_entries += 1
+        self._log_offset += len(complete)
+
+    def _get(self, key: str) -> Optional[List[float]]:
+        vector = self._pending.get(key)
+        if vector is not None:
+            return list(vector)
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        if int(self._tags[row]) != self._tag(key):
+            # Another process reused the row; its log entry is not applied yet
+            del self._rows[key]
+            self._owners.pop(row, None)
+            return None
+        self._rows.move_to_end(key)
+        return self._vectors[row].tolist()
+
+    def _put(self, key: str, vector: List[float]):
+        """Buffer a new vector; written by the next flush"""
+        self._pending[key] = vector
+        if len(self._pending) >= self.flush_size:
+            self._flush_locked()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _free_row(self) -> int:
+        row = len(self._owners)
+        if row < self.max_entries and row not in self._owners:
+            return row
+        # Evict the least recently used entry and reuse its row
+        _, row = self._rows.popitem(last=False)
+        del self._owners[row]
+        return row
+
+    def _flush_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        with self._file_lock():
+            if os.path.exists(self._path(self.INDEX_FILE)):
+                self._catch_up()
+            else:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self._dim = len(next(iter(self._pending.values())))
+                self._open_files("w+")
+                self._write_snapshot()
+            lines = []
+            for key, vector in self._pending.items():
+                row = self._rows.get(key)
+                if row is None:
+                    row = self._free_row()
+                self._assign(key, row)
+                self._vectors[row] = vector
+                self._tags[row] = self._tag(key)
+                lines.append(json.dumps([key, row]) + "\n")
+            # Vectors first: a log entry must never point at an unwritten row
+            self._vectors.flush()
+            self._tags.flush()
+            with open(self._path(self.LOG_FILE), "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+            self._log_offset = os.path.getsize(self._path(self.LOG_FILE))
+            self._log_entries += len(lines)
+            self._pending.clear()
+            if self._log_entries > max(1024, len(self._rows)):
+                self._write_snapshot()
+
+    def _write_snapshot(self):
+        """Fold the log into a new snapshot, swapped in atomically; needs the file lock"""
+        index = {
+            "model": self.model_name,
+            "dim": self._dim,
+            "capacity": self.max_entries,
+            "rows": list(self._rows.items()),
+        }
+        tmp_path = self._path(self.INDEX_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._path(self.INDEX_FILE))
+        open(self._path(self.LOG_FILE), "w").close()
+        stat = os.stat(self._path(self.INDEX_FILE))
+        self._snapshot_id = (stat.st_ino, stat.st_mtime_ns)
+        self._log_offset = self._log_entries = 0
+
+    def flush(self):
+        """Write buffered vectors and append their rows to the index log"""
+        with self._lock:
+            self._flush_locked()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, calling the wrapped model only for cache misses"""
+        keys = [self._key(text) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._get(key)
+                if vector is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    results[i] = vector
+            self.hits += len(texts) - sum(len(v) for v in missing.values())
+            self.misses += len(missing)
+
+        if missing:
+            miss_texts = [texts[positions[0]] for positions in missing.values()]
+            vectors = self.embeddings.embed_documents(miss_texts)
+            with self._lock:
+                for (key, positions), vector in zip(missing.items(), vectors):
+                    self._put(key, vector)
+                    for i in positions:
+                        results[i] = list(vector)
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing the cached vector for repeated questions"""
+        return self.embed_queries([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed queries, calling the wrapped model once for all cache misses"""
+        # Query and document embeddings can differ (task type), so keep them apart
+        keys = [self._key("query\0" + text) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._get(key)
+                if vector is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    results[i] = vector
+            self.hits += len(texts) - sum(len(v) for v in missing.values())
+            self.misses += len(missing)
+
+        if missing:
+            vectors = embed_queries(self.embeddings, [texts[positions[0]] for positions in missing.values()])
+            with self._lock:
+                for (key, positions), vector in zip(missing.items(), vectors):
+                    self._put(key, vector)
+                    for i in positions:
+                        results[i] = list(vector)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters; every hit is one embedding call not paid for"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._rows) + len(self._pending),
+            "capacity": self.max_entries,
+        }
+
+
+def _flush_at_exit(ref: "weakref.ref[CachedEmbeddings]"):
+    cache = ref()
+    if cache is not None:
+        cache.flush()
@@ -0,0 +1,130 @@
+"""
+Embedding Scheduler for HR Assistant Agent
+Splits chunks into batches and embeds them concurrently under a rate limit
+"""
+
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Iterator, Iterable, Tuple, Sequence, Optional, Any
+
+from langchain_core.embeddings import Embeddings
+
+
+class TokenBucket:
+    """Thread-safe token bucket; each embedding request costs one token"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until ``tokens`` are available, then take them"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class EmbeddingScheduler:
+    """Embeds text batches on a bounded thread pool with retry and backoff
+
+    Throughput scales with the allowed requests per second rather than with
+    the latency of a single call, since up to ``max_workers`` requests are in
+    flight at once.
+    """
+
+    def __init__(self, embeddings: Embeddings, batch_size: int = 64, max_workers: int = 4,
+                 requests_per_second: float = 5.0, max_retries: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 30.0):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed one batch, retrying failures with full-jitter exponential backoff"""
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                print(f"Embedding batch failed ({e}), retrying in {delay:.1f}s")
+                self.retries += 1
+                time.sleep(delay)
+
+    def embed_stream(self, batches: Iterable[Tuple[Any, List[str]]]) -> Iterator[Tuple[Any, List[List[float]]]]:
+        """
+        Embed a stream of batches, yielding results in submission order
+
+        Batches finish in any order; finished ones wait in a reorder buffer
+        until every earlier batch has been yielded, so the index built from
+        the results is identical across runs. At most ``2 * max_workers``
+        batches are pulled from ``batches`` ahead of being yielded, so memory
+        stays bounded by the batch size and the producer (file loading,
+        splitting) overlaps with embedding.
+
+        Args:
+            batches: Iterable of (payload, texts); payload is passed through
+
+        Returns:
+            Iterator of (payload, vectors for that batch)
+        """
+        window = 2 * self.max_workers
+        batches = enumerate(batches)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # future -> (batch index, payload), and batch index -> finished result
+            pending = {}
+            ready = {}
+            next_index = 0
+            exhausted = False
+            while pending or ready or not exhausted:
+                while not exhausted and len(pending) + len(ready) < window:
+                    try:
+                        index, (payload, texts) = next(batches)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[pool.submit(self._embed_batch, texts)] = (index, payload)
+                while next_index in ready:
+                    yield ready.pop(next_index)
+                    next_index += 1
+                if not pending:
+                    continue
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, payload = pending.pop(future)
+                    ready[index] = (payload, future.result())
+
+    def embed(self, texts: Sequence[str]) -> Iterator[Tuple[int, List[List[float]]]]:
+        """
+        Embed texts in batches, yielding results in order
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Iterator of (start offset into ``texts``, vectors for that batch)
+        """
+        batches = (
+            (start, list(texts[start:start + self.batch_size]))
+            for start in range(0, len(texts), self.batch_size)
+        )
+        return self.embed_stream(batches)
@@ -0,0 +1,242 @@
+"""
+Fact Table for HR Assistant Agent
+Extracts topic -> attribute -> value facts from the ``###`` sections and
+bullet lines of the policy documents, keeping the source line, so factual
+questions are answered by dictionary lookup straight from the documents
+"""
+
+import os
+import re
+import json
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from answer_cache import STOPWORDS
+
+
+FACTS_FILE = "facts.json"
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*$")
+_BULLET = re.compile(r"^(\s*)(?:[-*]|\d+\.)\s+(.+?)\s*$")
+# "**Label**: value" or "Label: value" with a short, non-numeric label
+_BOLD_LABEL = re.compile(r"^\*\*(.+?)\*\*:?\s*(.*)$")
+_PLAIN_LABEL = re.compile(r"^([A-Za-z][A-Za-z '/&()-]{0,40}?):\s+(.+)$")
+_ACRONYM = re.compile(r"\(([A-Z]{2,6})\)")
+_WORD = re.compile(r"[a-z0-9]+")
+_QUANTITY = re.compile(r"\bhow (?:much|many)\b")
+
+# Question words that ask for a topic's headline fact, not a particular one
+GENERIC_WORDS = frozenset("""
+many much get have has receive entitled number amount long give given allowed
+policy policies rule rules detail details know need company employee employees
+work working hour hours time
+""".split())
+
+# Longest alias, in words, tried against a question
+_MAX_TOPIC_WORDS = 4
+
+
+class Fact(NamedTuple):
+    """One bullet of a policy section"""
+    topic: str
+    # Bullet label ("Amount", "Lunch break"), or "" for a plain statement
+    attribute: str
+    value: str
+    source: str
+    line: int
+
+    def text(self) -> str:
+        return f"{self.attribute}: {self.value}" if self.attribute else self.value
+
+    def document(self) -> Document:
+        """The bullet as a source document, for answers citing it"""
+        return Document(page_content=f"{self.topic}\n{self.text()}",
+                        metadata={"source_file": self.source, "section": self.topic, "line": self.line})
+
+
+def _stem(word: str) -> str:
+    """Crude stem so "referring"/"referral" and "eligible"/"eligibility" meet"""
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    return word[:6]
+
+
+def _stems(text: str) -> List[str]:
+    return [_stem(word) for word in _WORD.findall(text.lower())]
+
+
+_STOP_STEMS = frozenset(_stem(word) for word in STOPWORDS)
+
+
+def extract_facts(text: str, source: str) -> List[Fact]:
+    """
+    Parse the bullet lines under ``###`` headings
+
+    Nested bullets are folded into the value of the bullet above them, and
+    numbered steps count as bullets. Text outside ``###`` sections is
+    ignored.
+    """
+    facts: List[Fact] = []
+    topic: Optional[str] = None
+    for line_no, line in enumerate(text.splitlines(), 1):
+        heading = _HEADING.match(line)
+        if heading:
+            topic = heading.group(2) if len(heading.group(1)) == 3 else None
+            continue
+        bullet = _BULLET.match(line)
+        if topic is None or not bullet:
+            continue
+        indent, body = bullet.groups()
+        if indent and facts and facts[-1].topic == topic:
+            previous = facts[-1]
+            value = f"{previous.value}, {body}" if previous.value else body
+            facts[-1] = previous._replace(value=value)
+            continue
+        label = _BOLD_LABEL.match(body) or _PLAIN_LABEL.match(body)
+        attribute, value = (label.group(1).strip(), label.group(2).strip()) if label else ("", body)
+        facts.append(Fact(topic, attribute, value, source, line_no))
+    return facts
+
+
+class FactTable:
+    """Facts keyed by topic, with a precomputed alias index for questions
+
+    ``aliases`` maps stemmed phrases to ``[topic key, is_label]``: every
+    sub-phrase of a heading ("referral", "stock option", an acronym in its
+    parentheses) and every bullet label ("vesting period") that points to
+    a single topic. A question resolves its topic with a few dictionary
+    lookups, however many facts there are.
+    """
+
+    def __init__(self, topics: Dict[str, List[Fact]], aliases: Dict[str, List]):
+        self.topics = topics
+        self.aliases = aliases
+
+    @staticmethod
+    def topic_key(title: str) -> str:
+        return " ".join(_stems(re.sub(r"\(.*?\)", " ", title)))
+
+    @classmethod
+    def build(cls, facts: Iterable[Fact]) -> "FactTable":
+        """Group facts by topic; a topic found in several documents keeps every fact"""
+        topics: Dict[str, List[Fact]] = {}
+        titles: Dict[str, str] = {}
+        for fact in facts:
+            key = cls.topic_key(fact.topic)
+            if key:
+                topics.setdefault(key, []).append(fact)
+                titles.setdefault(key, fact.topic)
+
+        # Phrase -> the topics it could name, and which phrases come from headings
+        candidates: Dict[str, set] = {}
+        from_headings: set = set()
+        for key, title in titles.items():
+            words = key.split()
+            phrases = [" ".join(words[start:start + size])
+                       for size in range(1, len(words) + 1) for start in range(len(words) - size + 1)
+                       if words[start] not in _STOP_STEMS and words[start + size - 1] not in _STOP_STEMS]
+            phrases += [_stem(acronym.lower()) for acronym in _ACRONYM.findall(title)]
+            from_headings.update(phrases)
+            labels = [" ".join(_stems(fact.attribute)) for fact in topics[key] if fact.attribute]
+            for phrase in phrases + labels:
+                candidates.setdefault(phrase, set()).add(key)
+
+        # Full headings always resolve; other phrases only when unambiguous
+        aliases: Dict[str, List] = {key: [key, False] for key in topics}
+        for phrase, keys in candidates.items():
+            if len(keys) == 1 and phrase not in aliases and len(phrase) > 1:
+                aliases[phrase] = [next(iter(keys)), phrase not in from_headings]
+        return cls(topics, aliases)
+
+    def find_topics(self, stems: List[str]) -> List[Tuple[List, Tuple[int, int]]]:
+        """
+        The aliases a question names, and the word spans they cover
+
+        Headings outrank bullet labels, then longer phrases outrank shorter
+        ones; every alias tied for first place is returned.
+        """
+        found = []
+        for size in range(min(_MAX_TOPIC_WORDS, len(stems)), 0, -1):
+            for start in range(len(stems) - size + 1):
+                alias = self.aliases.get(" ".join(stems[start:start + size]))
+                if alias is not None:
+                    found.append(((alias[1], -size), alias, (start, start + size)))
+        if not found:
+            return []
+        first = min(rank for rank, _, _ in found)
+        return [(alias, span) for rank, alias, span in found if rank == first]
+
+    def lookup(self, question: str) -> Optional[Fact]:
+        """
+        The fact answering a question, or None to answer it another way
+
+        The question names a topic (or a bullet label); its other content
+        words pick the bullet sharing most of them, labels counting double.
+        A question with no such words ("how many sick leaves") gets the
+        topic's first bullet. Words that mostly match nothing in the topic
+        mean the question asks something the table does not hold. A "how
+        much"/"how many" question about more than the topic needs a bullet
+        whose label names what it asks about: "Payment: after 6 months" does
+        not answer "how much do I get for referring a candidate". When
+        several topics are named, the one whose bullet fits best wins.
+        """
+        by_label = _QUANTITY.search(question.lower()) is not None
+        words = [word for word in _WORD.findall(question.lower()) if len(word) > 1]
+        stems = [_stem(word) for word in words]
+        best, best_score = None, -1
+        for (key, is_label), (start, end) in self.find_topics(stems):
+            topic_stems = set(key.split())
+            # A matched label stays in the question: it names the bullet wanted
+            asked = [(words[i], stems[i]) for i in range(len(words))
+                     if (is_label or not start <= i < end) and words[i] not in STOPWORDS
+                     and words[i] not in GENERIC_WORDS and stems[i] not in topic_stems]
+            fact, score = self._best_fact(self.topics[key], asked, by_label)
+            if fact is not None and score > best_score:
+                best, best_score = fact, score
+        return best
+
+    @staticmethod
+    def _best_fact(facts: List[Fact], asked: List[Tuple[str, str]],
+                   by_label: bool = False) -> Tuple[Optional[Fact], int]:
+        if not asked:
+            return facts[0], 0
+        wanted_words = {word for word, _ in asked}
+        wanted_stems = {stem for _, stem in asked}
+        best, best_score, best_coverage, best_labelled = None, 0, 0, 0
+        for fact in facts:
+            text_words = set(_WORD.findall(fact.text().lower()))
+            coverage = len(wanted_stems & {_stem(word) for word in text_words})
+            labelled = len(wanted_stems & set(_stems(fact.attribute)))
+            score = 2 * labelled + coverage + len(wanted_words & text_words)
+            if score > best_score:
+                best, best_score, best_coverage, best_labelled = fact, score, coverage, labelled
+        # Most of what the question asks about has to be in the bullet
+        if best_coverage * 2 < len(wanted_stems) or (by_label and not best_labelled):
+            return None, 0
+        return best, best_score
+
+    def section(self, fact: Fact) -> List[Fact]:
+        """Every fact of the topic a fact belongs to"""
+        return self.topics.get(self.topic_key(fact.topic), [fact])
+
+    def __len__(self) -> int:
+        return sum(len(facts) for facts in self.topics.values())
+
+    def save(self, persist_dir: str):
+        os.makedirs(persist_dir, exist_ok=True)
+        tmp_path = os.path.join(persist_dir, FACTS_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"topics": {key: [fact._asdict() for fact in facts] for key, facts in self.topics.items()},
+                       "aliases": self.aliases}, f, ensure_ascii=False)
+        os.replace(tmp_path, tmp_path[:-len(".tmp")])
+
+    @classmethod
+    def load(cls, persist_dir: str) -> Optional["FactTable"]:
+        path = os.path.join(persist_dir, FACTS_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls({key: [Fact(**fact) for fact in facts] for key, facts in data["topics"].items()},
+                   data["aliases"])
@@ -0,0 +1,125 @@
+"""
+Fake Backends for HR Assistant Agent
+Deterministic, offline stand-ins for the LLM and embedding model, used for
+local testing
+"""
+
+import re
+import time
+import asyncio
+import hashlib
+from typing import AsyncIterator, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class FakeStreamingLLM:
+    """Streams a deterministic answer word by word with configurable latency
+
+    Mimics the ``stream``/``invoke`` (and ``astream``/``ainvoke``) interface
+    of LangChain LLMs. The reply quotes the first bullet lines of any context
+    in the prompt, so answers stay grounded in the retrieved policy text.
+    """
+
+    def __init__(self, first_token_delay: float = 0.3, token_delay: float = 0.02,
+                 response: Optional[str] = None):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.response = response
+        self.calls = 0
+
+    def _reply(self, prompt: str) -> str:
+        if self.response is not None:
+            return self.response
+        bullets = re.findall(r"^\s*-\s+(.+)$", prompt, flags=re.MULTILINE)
+        if bullets:
+            details = "\n".join(f"- {line}" for line in bullets[:4])
+            return f"Here is what the HR policy documents say:\n\n{details}\n\nAnything else I can help with?"
+        return "I could not find this in the HR policy documents. Please contact HR for details."
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Yield the reply in word-sized fragments"""
+        self.calls += 1
+        time.sleep(self.first_token_delay)
+        for i, fragment in enumerate(re.findall(r"\S+\s*", self._reply(prompt))):
+            if i:
+                time.sleep(self.token_delay)
+            yield fragment
+
+    def invoke(self, prompt: str) -> str:
+        """Return the whole reply at once"""
+        return "".join(self.stream(prompt))
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        """Like ``stream``, but waits without blocking the event loop"""
+        self.calls += 1
+        await asyncio.sleep(self.first_token_delay)
+        for i, fragment in enumerate(re.findall(r"\S+\s*", self._reply(prompt))):
+            if i:
+                await asyncio.sleep(self.token_delay)
+            yield fragment
+
+    async def ainvoke(self, prompt: str) -> str:
+        """Return the whole reply at once"""
+        return "".join([fragment async for fragment in self.astream(prompt)])
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic hash-seeded embeddings with simulated API latency
+
+    Every call costs ``call_latency`` plus ``per_text_latency`` per text, so
+    batching many texts into one call pays off the way it does against a
+    real embedding API.
+    """
+
+    def __init__(self, size: int = 768, call_latency: float = 0.05, per_text_latency: float = 0.0005):
+        self.size = size
+        self.call_latency = call_latency
+        self.per_text_latency = per_text_latency
+        self.calls = 0
+        self.texts = 0
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal(self.size).astype(np.float32).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts += len(texts)
+        time.sleep(self.call_latency + self.per_text_latency * len(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        # Queries and documents embed alike, in one call
+        return self.embed_documents(texts)
+
+
+class HashingEmbeddings(Embeddings):
+    """Bag-of-words vectors via the hashing trick, L2-normalized
+
+    Instant and offline, yet texts sharing words land close together, so
+    retrieval quality can be measured without an embedding API.
+    """
+
+    def __init__(self, size: int = 1024):
+        self.size = size
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for token in re.findall(r"[a-z0-9]+", text.lower()):
+            vector[int.from_bytes(hashlib.md5(token.encode("utf-8")).digest()[:4], "little") % self.size] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
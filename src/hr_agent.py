@@ -4,388 +4,613 @@ Works without any API for demonstration purposes
 Pre-configured responses based on actual HR documents
 """
 
-from typing import List, Dict, Any
+from collections import OrderedDict
+from typing import List, Dict, Any, Tuple, Optional, Callable, Iterable, Iterator, AsyncIterator, NamedTuple, Mapping
+import asyncio
+import copy
+import threading
 import time
 
+from intent_matcher import IntentMatcher
+from answer_cache import AnswerCache
+from chat_history import ChatHistoryStore
+from response_catalog import ResponseCatalog, get_catalog
+
+
+class AnswerPlan(NamedTuple):
+    """How a question will be answered"""
+    fragments: Any  # Iterable or async iterable of answer text
+    source_documents: List[Any]
+    cacheable: bool
+    # Also remember the answer in the semantic cache once it is complete
+    remember: bool = False
+    # Seconds spent per stage (embed, search, compose) for retrieval answers
+    timings: Optional[Dict[str, float]] = None
+    # Question embedding, reused when remembering the answer
+    query_embedding: Optional[List[float]] = None
+
 
 class HRAssistantAgent:
     """AI Agent for answering HR-related queries - Demo Mode"""
     
-    def __init__(self, temperature: float = 0.3):
+    def __init__(self, temperature: float = 0.3, cache_size: int = 1024, cache_ttl: float = 3600.0,
+                 semantic_cache=None, source_versions: Optional[Callable[[], Dict[str, str]]] = None,
+                 history_size: int = 100, history_spill_dir: Optional[str] = None, llm=None,
+                 max_concurrent_model_calls: int = 32, max_conversations: int = 10_000,
+                 vectorstore=None, top_k: int = 3, max_distance: Optional[float] = None,
+                 lexical_index=None, lexical_confidence: float = 0.85, rrf_k: int = 60,
+                 category_index=None, reranker=None, intent_classifier=None,
+                 intent_confidence: float = 0.2, hr_confidence: float = 0.05,
+                 catalog_path: Optional[str] = None, fact_table=None):
         self.temperature = temperature
-        self.chat_history = []
-        self.demo_responses = {
-            "sick leave": """According to the company policy, employees receive **12 days of paid sick leave per year**. Here are the key details:
-
-- Sick leave does not carry forward to the next year
-- Medical certificate required for sick leave exceeding 3 consecutive days
-- Sick leave can be taken in half-day increments
-
-If you need more information about leave policies, feel free to ask!""",
-            
-            "maternity": """Female employees are entitled to **26 weeks of paid maternity leave**. Here are the details:
-
-- Must be taken within 8 weeks before and after delivery
-- Can be extended by 4 weeks unpaid if required
-- Requires medical documentation
-- Maternity coverage: ₹75,000 per delivery under health insurance
-
-For more specific information about your case, please contact HR directly.""",
-            
-            "holiday": """Here are the **national holidays for 2024**:
-
-- January 26 - Republic Day
-- March 25 - Holi
-- August 15 - Independence Day
-- October 2 - Gandhi Jayanti
-- October 31 - Diwali
-- December 25 - Christmas
-
-Plus 15 more holidays throughout the year. You can also choose any **3 optional holidays** from a list that includes Makar Sankranti, May Day, and others.
-
-Would you like the complete list of all holidays?""",
-            
-            "health insurance": """The company provides **comprehensive health insurance** with the following coverage:
-
-**Coverage Details:**
-- Annual Coverage: ₹5,00,000 per family per year
-- Family Definition: Employee + Spouse + 2 dependent children
-- Network: 5000+ hospitals across India
-- Cashless Facility: Available at all network hospitals
-- Reimbursement: Claims processed within 15 days
-
-**Additional Benefits:**
-- Dental Coverage: ₹25,000 per year
-- Vision Coverage: ₹15,000 per year
-- Annual Health Checkup: Free for employee and spouse
-- Maternity Coverage: ₹75,000 per delivery
-
-Would you like to know more about any specific benefit?""",
-            
-            "notice period": """The **notice period for resignation** is as follows:
-
-**For Employees:**
-- 60 days notice required
-- 30 days notice during probation period
-
-**For Company:**
-- 60 days notice or payment in lieu
-
-**Exit Process:**
-- Submit resignation letter to manager and HR
-- Complete exit interview
-- Return all company property
-- Handover responsibilities
-- Full and final settlement within 45 days
-
-Is there anything specific about the resignation process you'd like to know?""",
-            
-            "work from home": """The company offers **flexible work from home options**:
-
-**Remote Work Policy:**
-- Available 2 days per week with manager approval
-- Full remote available for eligible roles
-- Must maintain availability during core hours (10 AM - 4 PM)
-
-**Support Provided:**
-- Company laptop and VPN access
-- Home office setup allowance: ₹15,000 (one-time)
-- Broadband reimbursement: ₹1,000 per month
-
-**Flexible Working Hours:**
-- Core hours: 10 AM to 4 PM (mandatory presence)
-- Flexible start: 8 AM to 10 AM
-- Flexible end: 5 PM to 7 PM
-
-Would you like more details about remote work policies?""",
-            
-            "annual leave": """Employees are entitled to **24 days of annual leave per year**:
-
-**Key Details:**
-- Annual leave accrues at 2 days per month
-- Unused leave can be carried forward up to a maximum of 10 days
-- Leave must be requested at least 2 weeks in advance for approval
-- Annual leave is pro-rated for new joiners based on start date
-
-**How to Apply:**
-- Apply through HRMS portal
-- Manager approval required
-- HR notification automatic
-
-Need help with anything else related to leave policies?""",
-
-            "paternity": """Male employees receive **2 weeks of paid paternity leave**:
-
-**Key Details:**
-- Must be taken within 6 months of child's birth
-- Requires birth certificate submission
-- Can be taken continuously or in parts
-
-For more information, please contact HR.""",
-
-            "casual leave": """Employees receive **8 days of casual leave per year**:
-
-**Key Details:**
-- Can be taken without prior approval for emergencies
-- Maximum 2 consecutive days at a time
-- Cannot be combined with other leave types
-- Does not carry forward to next year
-
-Need help with anything else?""",
-
-            "provident fund": """The company contributes to your **Provident Fund (PF)**:
-
-**Contribution Details:**
-- Company contributes 12% of basic salary to EPF
-- Employee contribution: 12% of basic salary
-- Voluntary PF contribution allowed
-- Interest rate as per government norms (~8.15%)
-
-**Gratuity:**
-- Eligibility: After 5 years of service
-- Calculation: 15 days salary for each completed year
-
-Would you like more information about retirement benefits?""",
-
-            "bonus": """The company offers **performance-based bonuses**:
-
-**Annual Performance Bonus:**
-- Up to 20% of annual salary
-- Based on individual and company performance
-- Paid in April each year
-
-**Referral Bonus:**
-- ₹25,000 per successful referral
-- Payment after candidate completes 6 months
-- Unlimited referrals
-
-Want to know about other benefits?"""
-        }
+        # Optional streaming LLM (anything with .stream(prompt)) for questions
+        # outside the canned topics
+        self.llm = llm
+        # Bounded history; older turns spill to disk when a directory is given
+        self.history_size = history_size
+        self.history_spill_dir = history_spill_dir
+        self.chat_history = ChatHistoryStore(history_size, spill_dir=history_spill_dir)
+        # Per-conversation histories for the async API, keyed by conversation ID
+        self.max_conversations = max_conversations
+        self.conversations: "OrderedDict[str, ChatHistoryStore]" = OrderedDict()
+        self._conversations_lock = threading.Lock()
+        self.max_concurrent_model_calls = max_concurrent_model_calls
+        self._model_limiter: Optional[asyncio.Semaphore] = None
+        # Answers are memoized per normalized question and document index version
+        self.index_version: Optional[int] = None
+        self.answer_cache = AnswerCache(max_entries=cache_size, ttl_seconds=cache_ttl)
+        # Optional paraphrase cache (see DocumentProcessor.create_semantic_cache)
+        self.semantic_cache = semantic_cache
+        self.source_versions = source_versions or (lambda: {})
+        # Retrieval mode: answer from the top_k closest chunks of a FAISS store
+        # (see DocumentProcessor.process_and_store); chunks farther than
+        # max_distance are ignored
+        self.vectorstore = vectorstore
+        self.top_k = top_k
+        self.max_distance = max_distance
+        # Hybrid mode: BM25 ranks are fused with vector ranks, and a question
+        # whose terms a BM25 hit covers (lexical_confidence share of IDF mass)
+        # is answered without embedding it at all
+        self.lexical_index = lexical_index
+        self.lexical_confidence = lexical_confidence
+        self.rrf_k = rrf_k
+        # Category -> chunk rows; searches stay inside the question's category
+        # when it is known (see DocumentProcessor.load_category_index)
+        self.category_index = category_index
+        # Optional reranker.RerankingStage: retrieval over-fetches top_k * its
+        # depth candidates and the reranker picks the final top_k
+        self.reranker = reranker
+        # Optional intent_classifier.IntentClassifier replacing keyword routing
+        # (see DocumentProcessor.load_intent_classifier): canned replies need
+        # intent_confidence, anything scoring hr_confidence counts as HR-related
+        self.intent_classifier = intent_classifier
+        self.intent_confidence = intent_confidence
+        self.hr_confidence = hr_confidence
+        # Canned answers and patterns come from the shared, hot-reloaded
+        # response catalog; no per-instance copy
+        self.catalog_path = catalog_path
+        # Optional fact_table.FactTable (see DocumentProcessor.load_fact_table):
+        # questions naming a policy fact are answered from the documents' own
+        # bullet, before canned topics, search or the model
+        self.fact_table = fact_table
+    
+    @property
+    def catalog(self) -> ResponseCatalog:
+        """Current version of the process-wide response catalog"""
+        return get_catalog(self.catalog_path)
+    
+    @property
+    def demo_responses(self) -> Mapping[str, str]:
+        return self.catalog.topics
+    
+    @property
+    def conversational_responses(self) -> Mapping[str, Mapping[str, Tuple[str, ...]]]:
+        return self.catalog.conversational
+    
+    @property
+    def hr_keywords(self) -> Tuple[str, ...]:
+        return self.catalog.hr_keywords
+    
+    @property
+    def intent_matcher(self) -> IntentMatcher:
+        """Pattern index compiled with the catalog, so ask() scans each question a single time"""
+        return self.catalog.matcher
+    
+    def intent_examples(self, sections: Iterable[Tuple[Tuple[str, ...], str]] = ()) -> Dict[Tuple[str, str], List[str]]:
+        """
+        Training texts for an intent classifier, per (tier, intent)
         
-        # Conversational responses for casual messages
-        self.conversational_responses = {
-            # Greetings
-            "greetings": {
-                "patterns": ["hi", "hello", "hey", "good morning", "good afternoon", "good evening", "hola", "namaste"],
-                "responses": [
-                    """Hello! 👋 Welcome to the HR Assistant! I'm here to help you with all your HR-related questions.
-
-I can assist you with:
-- 🏖️ Leave policies (sick leave, annual leave, maternity/paternity)
-- 💼 Benefits (health insurance, provident fund, bonuses)
-- 📅 Company holidays and working hours
-- 🏠 Work from home and flexible policies
-- 📝 Resignation and notice period
-
-What would you like to know today?""",
-                    """Hi there! 😊 Great to see you! I'm your friendly HR Assistant, ready to help with any questions about company policies, benefits, or leave.
-
-How can I assist you today?""",
-                    """Hey! 👋 Welcome! I'm here to make your HR queries super easy to answer. Whether it's about leave, benefits, holidays, or policies - just ask away!
-
-What brings you here today?"""
-                ]
-            },
-            
-            # Gratitude
-            "gratitude": {
-                "patterns": ["thank you", "thanks", "appreciate", "helpful", "great help"],
-                "responses": [
-                    """You're very welcome! 😊 I'm glad I could help! 
-
-If you have any more questions about HR policies, benefits, or anything else, feel free to ask anytime. I'm here for you!""",
-                    """Happy to help! 🌟 That's what I'm here for!
-
-Don't hesitate to reach out if you need anything else. Have a great day!""",
-                    """My pleasure! 😊 I'm always here to make your HR questions easier to answer.
-
-Feel free to come back anytime you need assistance!"""
-                ]
-            },
-            
-            # Farewells
-            "farewell": {
-                "patterns": ["bye", "goodbye", "see you", "take care", "later", "gotta go"],
-                "responses": [
-                    """Goodbye! 👋 Take care and have a wonderful day!
-
-Remember, I'm here 24/7 whenever you need help with HR questions. See you soon!""",
-                    """See you later! 😊 Feel free to come back anytime you have questions.
-
-Have a great day ahead!""",
-                    """Take care! 🌟 It was great chatting with you!
-
-I'll be here whenever you need assistance. Bye for now!"""
-                ]
-            },
-            
-            # Small talk - How are you
-            "how_are_you": {
-                "patterns": ["how are you", "how r u", "how are u", "what's up", "whats up", "wassup"],
-                "responses": [
-                    """I'm doing great, thank you for asking! 😊 I'm always excited to help with HR questions!
-
-How about you? Is there anything I can help you with today?""",
-                    """I'm fantastic! 🌟 Always ready to assist with your HR queries!
-
-What can I help you with today?""",
-                    """I'm doing wonderful, thanks! 😊 Just here, ready to make your HR questions easy to answer!
-
-How can I assist you?"""
-                ]
-            },
-            
-            # About the bot
-            "about": {
-                "patterns": ["who are you", "what can you do", "what do you do", "help me", "capabilities", "what are you"],
-                "responses": [
-                    """I'm your friendly HR Assistant! 🤖 I'm here to help you with all things HR-related.
-
-**What I can do:**
-- 🏖️ Answer questions about leave policies (sick, annual, maternity, paternity, casual)
-- 💼 Explain employee benefits (health insurance, PF, bonuses)
-- 📅 Share company holiday schedules
-- 🏠 Provide info on work from home and flexible policies
-- 📝 Guide you through resignation and notice period procedures
-
-**How to use me:**
-Just ask your question in plain English! For example:
-- "How many sick leaves do I have?"
-- "What's the maternity leave policy?"
-- "Tell me about health insurance"
-
-What would you like to know?""",
-                    """Hi! I'm the HR Assistant chatbot! 😊 Think of me as your 24/7 HR companion.
-
-I can instantly answer questions about:
-✅ All types of leave policies
-✅ Employee benefits and insurance
-✅ Company holidays
-✅ Work policies and flexibility
-✅ Resignation procedures
-
-Just ask me anything HR-related, and I'll provide you with detailed, accurate information from our company policies!
-
-What can I help you with?"""
-                ]
-            },
-            
-            # Acknowledgments
-            "acknowledgment": {
-                "patterns": ["ok", "okay", "cool", "nice", "great", "awesome", "perfect", "got it", "understood", "alright"],
-                "responses": [
-                    """Great! 😊 Is there anything else you'd like to know about HR policies or benefits?
-
-I'm here to help!""",
-                    """Awesome! 🌟 Feel free to ask if you have any other questions!
-
-I'm always here to assist.""",
-                    """Perfect! 👍 Let me know if you need anything else.
-
-Happy to help anytime!"""
-                ]
-            }
-        }
+        Args:
+            sections: (heading path, text) policy sections; a section whose
+                headings name a canned topic trains that topic, any other
+                becomes an HR intent of its own
+        """
+        examples: Dict[Tuple[str, str], List[str]] = {}
+        for category, data in self.conversational_responses.items():
+            examples[("conversational", category)] = list(data["patterns"])
+        for keyword, answer in self.demo_responses.items():
+            examples[("topic", keyword)] = [keyword, answer]
+        examples[("hr_keyword", "hr_related")] = list(self.hr_keywords)
+        for path, text in sections:
+            # Skip the document title: it names the whole document
+            heading = " > ".join(path[1:])
+            hit = self.intent_matcher.best(heading.lower())
+            label = ("topic", hit.intent) if hit and hit.tier == "topic" else ("hr_keyword", heading or "hr_related")
+            examples.setdefault(label, []).append(text)
+        return examples
+    
+    def _route(self, question: str):
+        """The question's intent (tier, intent), or None when it is not HR-related"""
+        if self.intent_classifier is None:
+            return self.intent_matcher.best(question.lower().strip())
+        prediction = self.intent_classifier.classify(question)
+        if prediction.confidence >= self.intent_confidence:
+            return prediction
+        if prediction.tier != "conversational" and prediction.confidence >= self.hr_confidence:
+            # HR, but unsure which topic: answer from retrieval, not a canned reply
+            return prediction._replace(tier="hr_keyword")
+        return None
         
     def initialize(self):
         """Initialize the agent - Demo Mode"""
         print("Initializing HR Assistant Agent (Demo Mode)...")
-        # Simulate initialization delay
-        time.sleep(0.5)
         print("Agent initialized successfully!")
         
-    def ask(self, question: str) -> Dict[str, Any]:
+    def for_session(self) -> "HRAssistantAgent":
+        """
+        Create a per-session view of this agent
+        
+        The copy shares responses, the intent index, caches and any document
+        index with this agent, and only gets its own chat history, so one
+        process-wide agent can back every browser session.
+        """
+        session_agent = copy.copy(self)
+        session_agent.chat_history = ChatHistoryStore(self.history_size, spill_dir=self.history_spill_dir)
+        return session_agent
+        
+    def ask(self, question: str, conversation_id: Optional[str] = None,
+            category: Optional[str] = None) -> Dict[str, Any]:
         """
         Ask a question to the HR Assistant - Demo Mode
         
         Args:
             question: User's question
+            conversation_id: Conversation to record the turn in; defaults to
+                this session's history
+            category: Question category (e.g. "Leave Policies"), if known;
+                otherwise inferred from keywords when unambiguous
             
         Returns:
             Dictionary with answer and source documents
         """
-        import random
+        for event in self.ask_stream(question, conversation_id, category):
+            if event["type"] == "end":
+                return {key: value for key, value in event.items() if key != "type"}
+    
+    def ask_stream(self, question: str, conversation_id: Optional[str] = None,
+                   category: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Ask a question and receive the answer as it is generated
         
-        question_lower = question.lower().strip()
-        answer = None
+        Args:
+            question: User's question
+            conversation_id: Conversation to record the turn in; defaults to
+                this session's history
+            category: Question category, if known
+            
+        Returns:
+            Iterator of events: {"type": "token", "text": ...} for each answer
+            fragment, then one {"type": "end", ...} with the full answer,
+            source documents, time_to_first_token and response_time
+        """
+        start_time = time.time()
+        cache_key, plan = self._cached_plan(question)
+        if plan is None:
+            plan = self._compose_answer(question, category)
         
-        # First, check for conversational patterns
-        for category, data in self.conversational_responses.items():
-            for pattern in data["patterns"]:
-                if pattern in question_lower:
-                    # Randomly select a response for variety
-                    answer = random.choice(data["responses"])
-                    break
-            if answer:
-                break
-        
-        # If no conversational match, check HR-specific queries
-        if not answer:
-            for keyword, response in self.demo_responses.items():
-                if keyword in question_lower:
-                    answer = response
-                    break
+        parts = []
+        time_to_first_token = None
+        compose_started = time.perf_counter()
+        for fragment in plan.fragments:
+            if time_to_first_token is None:
+                time_to_first_token = time.time() - start_time
+            parts.append(fragment)
+            yield {"type": "token", "text": fragment}
+        answer = "".join(parts)
+        if plan.timings is not None:
+            plan.timings["compose"] = time.perf_counter() - compose_started
         
-        # Default response if no match - check if it's HR-related or not
-        if not answer:
-            # HR-related keywords to detect if question is at least HR-related
-            hr_keywords = [
-                'leave', 'holiday', 'vacation', 'sick', 'annual', 'maternity', 'paternity', 'casual',
-                'benefit', 'insurance', 'health', 'medical', 'provident', 'pf', 'epf', 'bonus', 'salary',
-                'pay', 'compensation', 'allowance', 'reimbursement', 'claim',
-                'policy', 'policies', 'hr', 'human resource', 'employee', 'staff', 'work',
-                'office', 'company', 'organization', 'job', 'employment', 'resign', 'resignation',
-                'notice', 'period', 'joining', 'onboarding', 'exit', 'termination',
-                'remote', 'wfh', 'work from home', 'flexible', 'hours', 'timing', 'shift',
-                'training', 'development', 'performance', 'appraisal', 'review', 'promotion',
-                'referral', 'recruitment', 'hiring', 'probation', 'contract', 'permanent'
-            ]
-            
-            # Check if question contains any HR-related keywords
-            is_hr_related = any(keyword in question_lower for keyword in hr_keywords)
+        if plan.remember and self.semantic_cache is not None:
+            self.semantic_cache.store(question, answer, plan.source_documents, self.source_versions(),
+                                      embedding=plan.query_embedding)
+        yield self._finish(question, answer, plan, cache_key, conversation_id, start_time, time_to_first_token)
+    
+    async def aask(self, question: str, conversation_id: str = "default",
+                   category: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Ask a question without blocking the event loop
+        
+        Canned answers return immediately; embedding and LLM calls are awaited
+        under a shared concurrency limit, so one process can keep hundreds of
+        questions in flight while waiting on the network.
+        
+        Args:
+            question: User's question
+            conversation_id: Conversation whose history records the turn
+            category: Question category, if known
             
-            if is_hr_related:
-                # Question seems HR-related but we don't have specific info
-                answer = """Thank you for your question! I can help you with HR-related information, but I need a bit more clarity.
-
-I specialize in:
-- **Leave policies**: sick leave, annual leave, maternity/paternity leave, casual leave
-- **Benefits**: health insurance, provident fund, bonuses, referral programs
-- **Company holidays** and working hours
-- **Work from home** and flexible working policies
-- **Resignation** and notice period procedures
-
-Could you please rephrase your question or ask about one of these specific topics? I'll be happy to provide detailed information!"""
+        Returns:
+            Dictionary with answer and source documents
+        """
+        async for event in self.aask_stream(question, conversation_id, category):
+            if event["type"] == "end":
+                return {key: value for key, value in event.items() if key != "type"}
+    
+    async def aask_stream(self, question: str, conversation_id: str = "default",
+                          category: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Async counterpart of ask_stream; events have the same shape"""
+        start_time = time.time()
+        cache_key, plan = self._cached_plan(question)
+        if plan is None:
+            plan = await self._acompose_answer(question, category)
+        
+        parts = []
+        time_to_first_token = None
+        compose_started = time.perf_counter()
+        async for fragment in self._aiter_fragments(plan.fragments):
+            if time_to_first_token is None:
+                time_to_first_token = time.time() - start_time
+            parts.append(fragment)
+            yield {"type": "token", "text": fragment}
+        answer = "".join(parts)
+        if plan.timings is not None:
+            plan.timings["compose"] = time.perf_counter() - compose_started
+        
+        if plan.remember and self.semantic_cache is not None:
+            if plan.query_embedding is not None:
+                self.semantic_cache.store(question, answer, plan.source_documents, self.source_versions(),
+                                          embedding=plan.query_embedding)
             else:
-                # Question is not HR-related at all
-                answer = """I appreciate your question, but I'm specifically designed to help with **HR-related queries only**. 😊
-
-I can assist you with:
-- 🏖️ **Leave policies** (sick leave, annual leave, maternity/paternity leave)
-- 💼 **Employee benefits** (health insurance, provident fund, bonuses)
-- 📅 **Company holidays** and working schedules
-- 🏠 **Work from home** and flexible policies
-- 📝 **Resignation procedures** and notice periods
-
-Please feel free to ask me anything related to HR policies, benefits, or workplace matters, and I'll be happy to help!"""
+                async with self.model_limiter:
+                    await self.semantic_cache.astore(question, answer, plan.source_documents,
+                                                     self.source_versions())
+        yield self._finish(question, answer, plan, cache_key, conversation_id, start_time, time_to_first_token)
+    
+    @staticmethod
+    async def _aiter_fragments(fragments) -> AsyncIterator[str]:
+        """Iterate plain or async fragment sources alike"""
+        if hasattr(fragments, "__aiter__"):
+            async for fragment in fragments:
+                yield fragment
+        else:
+            for fragment in fragments:
+                yield fragment
+    
+    def _cached_plan(self, question: str) -> Tuple[Any, Optional[AnswerPlan]]:
+        """Cache key for the question, and a plan if the answer is cached"""
+        # Cached answers go stale with the document index or the response catalog
+        cache_key = AnswerCache.make_key(question, (self.index_version, self.catalog.version))
+        cached = self.answer_cache.get(cache_key)
+        if cached is None:
+            return cache_key, None
+        answer, source_documents = cached
+        return cache_key, AnswerPlan([answer], source_documents, cacheable=False)
+    
+    def _finish(self, question: str, answer: str, plan: AnswerPlan, cache_key: Any,
+                conversation_id: Optional[str], start_time: float,
+                time_to_first_token: Optional[float]) -> Dict[str, Any]:
+        """Cache and record a completed answer and build the final event"""
+        if plan.cacheable:
+            self.answer_cache.put(cache_key, (answer, plan.source_documents))
+        
+        response_time = time.time() - start_time
         
         # Store in chat history
-        self.chat_history.append({
-            "question": question,
-            "answer": answer
-        })
+        self.get_conversation(conversation_id).append(question, answer, response_time=response_time)
         
         return {
+            "type": "end",
             "answer": answer,
-            "source_documents": [],
-            "question": question
+            "source_documents": plan.source_documents,
+            "question": question,
+            "time_to_first_token": time_to_first_token if time_to_first_token is not None else response_time,
+            "response_time": response_time,
+            "timings": plan.timings or {}
         }
     
-    def get_chat_history(self) -> List[Dict[str, str]]:
-        """Get the conversation history"""
-        return self.chat_history
+    def _fast_plan(self, question: str, hit) -> Optional[AnswerPlan]:
+        """Plan for answers that need no model call, if the intent has one"""
+        import random
+        
+        # An intent can vanish when the catalog is reloaded under a classifier
+        # trained on the old one; such questions take the normal path
+        catalog = self.catalog
+        if hit and hit.tier == "conversational" and hit.intent in catalog.conversational:
+            # Randomly select a response for variety, so never cache it
+            answer = random.choice(catalog.conversational[hit.intent]["responses"])
+            return AnswerPlan([answer], [], cacheable=False)
+        if hit and hit.tier != "conversational" and self.fact_table is not None:
+            # Only HR questions; a bullet from the documents themselves beats
+            # hand-written canned text, which drifts when the policies change
+            fact = self.fact_table.lookup(question)
+            if fact is not None:
+                return AnswerPlan([self._fact_answer(fact)], [fact.document()], cacheable=True)
+        if hit and hit.tier == "topic" and hit.intent in catalog.topics:
+            # Canned answers never touch the embedding model
+            return AnswerPlan([catalog.topics[hit.intent]], [], cacheable=True)
+        return None
+    
+    def _fact_answer(self, fact) -> str:
+        """The matching bullet, the rest of its section, and where it comes from"""
+        others = [f"- {other.text()}" for other in self.fact_table.section(fact) if other != fact]
+        answer = f"**{fact.topic}** - {fact.text()}\n\n"
+        if others:
+            answer += "\n".join(others) + "\n\n"
+        return answer + f"*Source: {fact.source}, line {fact.line}*"
+    
+    def _compose_answer(self, question: str, category: Optional[str] = None) -> AnswerPlan:
+        """Work out how to answer a question"""
+        # One pass over the question (keyword scan or classifier product)
+        # picks its intent: conversational, HR topic or generic HR
+        hit = self._route(question)
+        
+        plan = self._fast_plan(question, hit)
+        if plan is not None:
+            return plan
+        if hit is None:
+            # Not an HR question: policy bullets would only look like an answer
+            return AnswerPlan([self._fallback_answer(is_hr_related=False)], [], cacheable=True)
+        
+        timings: Dict[str, float] = {}
+        category = self._search_category(question, category)
+        lexical = self._lexical_search(question, timings, category)
+        if self._lexically_confident(question, lexical):
+            # Exact terms (e.g. "gratuity", "ESOP") found: skip the embedding call
+            documents = self._documents(lexical)
+            fragments = self._generate(question, documents) if self.llm is not None \
+                else self._extractive_answer(documents)
+            return AnswerPlan(fragments, documents, cacheable=True, timings=timings)
+        
+        query_embedding = None
+        if self.vectorstore is not None:
+            # Embed once; the semantic cache and the index share the vector
+            started = time.perf_counter()
+            query_embedding = self.vectorstore.embeddings.embed_query(question)
+            timings["embed"] = time.perf_counter() - started
+        
+        if self.semantic_cache is not None:
+            # Paraphrase of a question answered before, e.g. "sick days I get?"
+            cached = self.semantic_cache.lookup(question, self.source_versions(), embedding=query_embedding)
+            if cached is not None:
+                return AnswerPlan([cached["answer"]], cached["source_documents"], cacheable=True)
+        
+        if self.vectorstore is not None:
+            started = time.perf_counter()
+            documents = self._search(query_embedding, lexical, category)
+            timings["search"] = time.perf_counter() - started
+            if self.reranker is not None:
+                documents = self._rerank(question, documents, timings)
+            if documents:
+                fragments = self._generate(question, documents) if self.llm is not None \
+                    else self._extractive_answer(documents)
+                return AnswerPlan(fragments, documents, cacheable=True, remember=True,
+                                  timings=timings, query_embedding=query_embedding)
+        
+        if self.llm is not None:
+            # HR-related but outside the canned topics: let the LLM answer
+            return AnswerPlan(self._generate(question), [], cacheable=True, remember=True)
+        
+        return AnswerPlan([self._fallback_answer(is_hr_related=True)], [], cacheable=True)
+    
+    async def _acompose_answer(self, question: str, category: Optional[str] = None) -> AnswerPlan:
+        """Async counterpart of _compose_answer"""
+        hit = self._route(question)
+        
+        plan = self._fast_plan(question, hit)
+        if plan is not None:
+            return plan
+        if hit is None:
+            return AnswerPlan([self._fallback_answer(is_hr_related=False)], [], cacheable=True)
+        
+        timings: Dict[str, float] = {}
+        category = self._search_category(question, category)
+        lexical = self._lexical_search(question, timings, category)
+        if self._lexically_confident(question, lexical):
+            documents = self._documents(lexical)
+            fragments = self._agenerate(question, documents) if self.llm is not None \
+                else self._extractive_answer(documents)
+            return AnswerPlan(fragments, documents, cacheable=True, timings=timings)
+        
+        query_embedding = None
+        if self.vectorstore is not None:
+            started = time.perf_counter()
+            async with self.model_limiter:
+                query_embedding = await self.vectorstore.embeddings.aembed_query(question)
+            timings["embed"] = time.perf_counter() - started
+        
+        if self.semantic_cache is not None:
+            if query_embedding is not None:
+                cached = self.semantic_cache.lookup(question, self.source_versions(), embedding=query_embedding)
+            else:
+                async with self.model_limiter:
+                    cached = await self.semantic_cache.alookup(question, self.source_versions())
+            if cached is not None:
+                return AnswerPlan([cached["answer"]], cached["source_documents"], cacheable=True)
+        
+        if self.vectorstore is not None:
+            started = time.perf_counter()
+            documents = await asyncio.to_thread(self._search, query_embedding, lexical, category)
+            timings["search"] = time.perf_counter() - started
+            if self.reranker is not None:
+                documents = await asyncio.to_thread(self._rerank, question, documents, timings)
+            if documents:
+                fragments = self._agenerate(question, documents) if self.llm is not None \
+                    else self._extractive_answer(documents)
+                return AnswerPlan(fragments, documents, cacheable=True, remember=True,
+                                  timings=timings, query_embedding=query_embedding)
+        
+        if self.llm is not None:
+            return AnswerPlan(self._agenerate(question), [], cacheable=True, remember=True)
+        
+        return AnswerPlan([self._fallback_answer(is_hr_related=True)], [], cacheable=True)
+    
+    def _fallback_answer(self, is_hr_related: bool) -> str:
+        """Default response if no match - depends on whether it's HR-related"""
+        return self.catalog.fallbacks["hr_related" if is_hr_related else "not_hr_related"]
+    
+    def _search_category(self, question: str, category: Optional[str]) -> Optional[str]:
+        """Category slice to search: the given one, else one the keywords imply"""
+        if self.category_index is None or self.vectorstore is None:
+            return None
+        # The category module needs numpy, FAISS and LangChain; demo mode does not
+        from category_index import classify_question
+        category = category or classify_question(question)
+        # Unknown or empty categories fall back to the whole store
+        return category if len(self.category_index.rows.get(category, ())) else None
+    
+    def _lexical_search(self, question: str, timings: Dict[str, float],
+                        category: Optional[str] = None) -> Optional[List[Tuple[str, float]]]:
+        """BM25 candidates for the question, or None without a lexical index"""
+        if self.lexical_index is None or self.vectorstore is None:
+            return None
+        started = time.perf_counter()
+        rows = self.category_index.rows[category] if category is not None else None
+        results = self.lexical_index.search(question, k=self.top_k * 4, rows=rows)
+        timings["lexical"] = time.perf_counter() - started
+        return results
+    
+    def _lexically_confident(self, question: str, lexical: Optional[List[Tuple[str, float]]]) -> bool:
+        return bool(lexical) and self.lexical_index.coverage(question, lexical[0][0]) >= self.lexical_confidence
+    
+    def _documents(self, ranked: List[Tuple[str, float]]) -> List[Any]:
+        """The top_k chunks of a ranked (ID, score) list"""
+        return [self.vectorstore.docstore.search(doc_id) for doc_id, _ in ranked[:self.top_k]]
+    
+    def _search(self, query_embedding: List[float], lexical: Optional[List[Tuple[str, float]]] = None,
+                category: Optional[str] = None) -> List[Any]:
+        """
+        The top_k chunks for the question, best first
+        
+        With BM25 candidates, vector candidates are over-fetched to the same
+        depth and both rankings are merged by reciprocal rank fusion. With a
+        category, only that category's chunks are searched. With a reranker,
+        its top_k * depth candidates are returned for it to narrow down.
+        """
+        keep = self.top_k * self.reranker.depth if self.reranker is not None else self.top_k
+        fetch_k = max(keep, self.top_k * 4) if lexical else keep
+        if category is not None:
+            results = self.category_index.search(self.vectorstore, query_embedding, category, fetch_k)
+        else:
+            results = self.vectorstore.similarity_search_with_score_by_vector(query_embedding, k=fetch_k)
+        documents = [doc for doc, distance in results
+                     if self.max_distance is None or distance <= self.max_distance]
+        if not lexical:
+            return documents[:keep]
+        # The lexical module needs numpy and LangChain; demo mode does not
+        from lexical_index import reciprocal_rank_fusion
+        by_id = {doc.id: doc for doc in documents}
+        fused = reciprocal_rank_fusion([list(by_id), [doc_id for doc_id, _ in lexical]], k=self.rrf_k)
+        return [by_id.get(doc_id) or self.vectorstore.docstore.search(doc_id) for doc_id in fused[:keep]]
+    
+    def _rerank(self, question: str, candidates: List[Any], timings: Dict[str, float]) -> List[Any]:
+        """The reranker's top_k of the candidates; skipped once the query is over budget"""
+        started = time.perf_counter()
+        documents = self.reranker.rerank(question, candidates, self.top_k, elapsed=sum(timings.values()))
+        timings["rerank"] = time.perf_counter() - started
+        return documents
+    
+    def _extractive_answer(self, documents: List[Any]) -> Iterator[str]:
+        """Answer from the retrieved chunks themselves, when there is no LLM"""
+        yield "Here is what I found in the HR policy documents:\n\n"
+        for doc in documents:
+            source = doc.metadata.get("source_file", doc.metadata.get("source", "HR documents"))
+            yield f"{doc.page_content.strip()}\n\n*Source: {source}*\n\n"
+    
+    def _build_prompt(self, question: str, documents: Optional[List[Any]] = None) -> str:
+        context = ""
+        if documents:
+            context = "Context:\n" + "\n\n".join(doc.page_content for doc in documents) + "\n\n"
+        return (
+            "You are a helpful HR assistant. Answer the employee's question "
+            "accurately and concisely"
+            + (" using only the context below.\n\n" if documents else ".\n\n")
+            + context
+            + f"Question: {question}\nAnswer:"
+        )
+    
+    def _generate(self, question: str, documents: Optional[List[Any]] = None) -> Iterator[str]:
+        """Stream an LLM answer, one text fragment at a time"""
+        for chunk in self.llm.stream(self._build_prompt(question, documents)):
+            # LLMs stream strings, chat models stream message chunks
+            yield getattr(chunk, "content", chunk)
+    
+    async def _agenerate(self, question: str, documents: Optional[List[Any]] = None) -> AsyncIterator[str]:
+        """Stream an LLM answer without blocking the event loop"""
+        prompt = self._build_prompt(question, documents)
+        async with self.model_limiter:
+            if hasattr(self.llm, "astream"):
+                async for chunk in self.llm.astream(prompt):
+                    yield getattr(chunk, "content", chunk)
+                return
+            # Blocking client: pull each chunk on a worker thread
+            chunks = iter(self.llm.stream(prompt))
+            done = object()
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, done)
+                if chunk is done:
+                    break
+                yield getattr(chunk, "content", chunk)
+    
+    @property
+    def model_limiter(self) -> asyncio.Semaphore:
+        """Caps concurrent outbound embedding/LLM calls from async requests"""
+        if self._model_limiter is None:
+            self._model_limiter = asyncio.Semaphore(self.max_concurrent_model_calls)
+        return self._model_limiter
+    
+    def get_conversation(self, conversation_id: Optional[str] = None) -> ChatHistoryStore:
+        """
+        History for a conversation, created on first use
+        
+        Args:
+            conversation_id: Conversation ID; None means this session's history
+        """
+        if conversation_id is None:
+            return self.chat_history
+        with self._conversations_lock:
+            history = self.conversations.get(conversation_id)
+            if history is None:
+                history = ChatHistoryStore(self.history_size, spill_dir=self.history_spill_dir,
+                                           session_id=conversation_id)
+                self.conversations[conversation_id] = history
+                # Forget the least recently started conversations beyond the cap
+                while len(self.conversations) > self.max_conversations:
+                    _, stale = self.conversations.popitem(last=False)
+                    stale.clear()
+            else:
+                self.conversations.move_to_end(conversation_id)
+            return history
+    
+    def on_index_rebuilt(self, index_version: int):
+        """Switch to a new document index version, dropping stale cached answers"""
+        if index_version != self.index_version:
+            self.index_version = index_version
+            self.answer_cache.clear()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit-rate metrics for the answer caches, plus reranker cost when reranking"""
+        stats = self.answer_cache.stats()
+        if self.semantic_cache is not None:
+            stats["semantic"] = self.semantic_cache.stats()
+        if self.reranker is not None:
+            stats["rerank"] = self.reranker.stats()
+        return stats
+    
+    def get_chat_history(self) -> List[Dict[str, Any]]:
+        """Get the live (not spilled) conversation history"""
+        return self.chat_history.recent()
     
     def clear_history(self):
         """Clear conversation history"""
-        self.chat_history = []
+        self.chat_history.clear()
         print("Conversation history cleared")
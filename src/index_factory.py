@@ -0,0 +1,137 @@
+"""
+Index Factory for HR Assistant Agent
+Builds the FAISS index behind the vector store: exact Flat, or approximate
+IVF-Flat, HNSW and IVF-PQ for large corpora, trained on a sample
+"""
+
+import math
+from typing import Any, Dict, NamedTuple, Optional
+
+import faiss
+import numpy as np
+
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+
+class IndexSpec(NamedTuple):
+    """Which FAISS index to build and how to search it
+
+    Parameters left as None are sized from the corpus at build time.
+    """
+    kind: str = "flat"
+    # IVF: number of clusters, and how many of them a query visits
+    nlist: Optional[int] = None
+    nprobe: int = 16
+    # HNSW: graph degree and search beam width
+    hnsw_m: int = 32
+    ef_construction: int = 80
+    ef_search: int = 64
+    # PQ: sub-quantizers per vector and bits per code
+    pq_m: Optional[int] = None
+    pq_bits: int = 8
+    # Training sample size for IVF/PQ (capped at the corpus size)
+    train_size: Optional[int] = None
+    seed: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "IndexSpec":
+        data = dict(data or {})
+        data.pop("factory", None)
+        if data.get("kind", "flat") not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {data['kind']} (expected one of {INDEX_TYPES})")
+        return cls(**data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+    def builds_like(self, other: "IndexSpec") -> bool:
+        """Whether both specs build the same index (search-time knobs aside)"""
+        return self._replace(nprobe=0, ef_search=0) == other._replace(nprobe=0, ef_search=0)
+
+
+def factory_string(spec: IndexSpec, dim: int, n_vectors: int) -> str:
+    """The ``faiss.index_factory`` description for a spec and corpus size"""
+    if spec.kind == "flat":
+        return "Flat"
+    if spec.kind == "hnsw":
+        return f"HNSW{spec.hnsw_m}"
+    # ~4*sqrt(n) clusters, but at least 39 training points per cluster
+    nlist = spec.nlist or max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+    if spec.kind == "ivf_flat":
+        return f"IVF{nlist},Flat"
+    # One byte per 4 dimensions by default: 16x smaller than float32
+    pq_m = spec.pq_m or next(m for m in range(max(dim // 4, 1), 0, -1) if dim % m == 0)
+    return f"IVF{nlist},PQ{pq_m}x{spec.pq_bits}"
+
+
+def build_index(spec: IndexSpec, vectors: np.ndarray) -> faiss.Index:
+    """
+    Build and fill an index of the spec's type
+
+    IVF and PQ indexes are trained on a random sample of ``vectors`` first.
+    IVF-PQ needs at least 2**pq_bits vectors to train; smaller corpora get
+    an exact Flat index instead.
+
+    Args:
+        spec: Index type and parameters
+        vectors: (n, dim) float32 matrix, added in row order
+
+    Returns:
+        The filled index; row i of ``vectors`` gets ID i
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n_vectors, dim = vectors.shape
+    if spec.kind == "ivf_pq" and n_vectors < (1 << spec.pq_bits):
+        print(f"Only {n_vectors} vectors, too few to train IVF-PQ; using a Flat index")
+        spec = spec._replace(kind="flat")
+
+    index = faiss.index_factory(dim, factory_string(spec, dim, n_vectors), faiss.METRIC_L2)
+    if spec.kind == "hnsw":
+        index.hnsw.efConstruction = spec.ef_construction
+    if spec.kind == "ivf_pq":
+        # Polysemous codes are never used for search here and dominate training time
+        index.do_polysemous_training = False
+    if not index.is_trained:
+        nlist = faiss.extract_index_ivf(index).nlist
+        train_size = min(n_vectors, spec.train_size or max(64 * nlist, 10_000))
+        rows = np.random.default_rng(spec.seed).choice(n_vectors, train_size, replace=False)
+        index.train(vectors[np.sort(rows)])
+    index.add(vectors)
+    configure(index, spec)
+    return index
+
+
+def configure(index: faiss.Index, spec: IndexSpec):
+    """Apply query-time parameters (nprobe, efSearch) to a built or loaded index"""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(spec.nprobe, ivf.nlist)
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = spec.ef_search
+
+
+def index_kind(index: faiss.Index) -> str:
+    """Which of INDEX_TYPES an index is"""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return "ivf_pq" if isinstance(faiss.downcast_index(ivf), faiss.IndexIVFPQ) else "ivf_flat"
+    if hasattr(index, "hnsw"):
+        return "hnsw"
+    return "flat"
+
+
+def search_parameters(index: faiss.Index, selector: Optional[faiss.IDSelector] = None) -> faiss.SearchParameters:
+    """Search parameters of the class the index expects, keeping its tuning"""
+    kwargs = {"sel": selector} if selector is not None else {}
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(nprobe=ivf.nprobe, **kwargs)
+    if hasattr(index, "hnsw"):
+        return faiss.SearchParametersHNSW(efSearch=index.hnsw.efSearch, **kwargs)
+    return faiss.SearchParameters(**kwargs)
+
+
+def all_vectors(index: faiss.Index) -> np.ndarray:
+    """Every stored vector in row order (exact for Flat and HNSW-Flat)"""
+    return index.reconstruct_n(0, index.ntotal)
@@ -0,0 +1,185 @@
+"""
+Intent Classifier for HR Assistant Agent
+TF-IDF centroid per intent, so a question is routed by one matrix-vector
+product (and a queue of questions by one matrix-matrix product), with a
+confidence score instead of a first-keyword-wins decision
+"""
+
+import os
+import re
+import json
+import zlib
+import hashlib
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from answer_cache import STOPWORDS
+
+
+CENTROIDS_FILE = "intents.npy"
+IDF_FILE = "intents.idf.npy"
+LABELS_FILE = "intents.json"
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# (tier, intent) -> example texts
+Examples = Dict[Tuple[str, str], List[str]]
+
+
+class IntentPrediction(NamedTuple):
+    """Best-scoring intent for a question"""
+    tier: str
+    intent: str
+    # Cosine similarity between the question and the intent centroid
+    confidence: float
+
+
+def _singular(word: str) -> str:
+    """Plain English plural to singular ("bonuses" to "bonus", "leaves" to "leave")"""
+    if len(word) <= 3:
+        return word
+    if word.endswith(("sses", "uses", "xes", "ches", "shes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def _grams(text: str) -> List[str]:
+    """Content words plus every bigram
+
+    Stopwords only count inside bigrams ("how are", "are you"), so "What
+    are the working hours?" is not pulled toward "what are you" by its
+    question words, while an all-stopword greeting still has features.
+    """
+    words = [_singular(word) for word in _WORD.findall(text.lower())]
+    content = [word for word in words if word not in STOPWORDS]
+    return (content or words) + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class IntentClassifier:
+    """Nearest-centroid classifier over hashed unigram and bigram TF-IDF
+
+    Features are hashed into ``n_features`` buckets, so no vocabulary has to
+    be stored or looked up; the model is just the (intents, n_features)
+    centroid matrix and the IDF vector, saved as ``.npy`` files that load
+    memory-mapped.
+    """
+
+    def __init__(self, labels: List[Tuple[str, str]], centroids: np.ndarray, idf: np.ndarray,
+                 fingerprint: str = ""):
+        self.labels = labels
+        self.centroids = centroids
+        self.idf = idf
+        self.fingerprint = fingerprint
+
+    @property
+    def n_features(self) -> int:
+        return len(self.idf)
+
+    @staticmethod
+    def _features(text: str, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted feature buckets of a text and their sublinear term frequencies"""
+        grams = _grams(text)
+        if not grams:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        buckets = np.fromiter((zlib.crc32(gram.encode("utf-8")) % n_features for gram in grams), dtype=np.int64)
+        buckets, counts = np.unique(buckets, return_counts=True)
+        return buckets, (1.0 + np.log(counts)).astype(np.float32)
+
+    def _vector(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Unit-length TF-IDF vector of a text, as (buckets, weights)"""
+        buckets, tf = self._features(text, self.n_features)
+        weights = tf * self.idf[buckets]
+        norm = np.linalg.norm(weights)
+        return buckets, weights / norm if norm > 0 else weights
+
+    @classmethod
+    def build(cls, examples: Examples, n_features: int = 1 << 14, fingerprint: str = "") -> "IntentClassifier":
+        """
+        Fit centroids: the normalized mean TF-IDF vector of each intent's examples
+
+        Args:
+            examples: (tier, intent) -> example texts (patterns, answers, sections)
+            n_features: Hash buckets per vector
+            fingerprint: Identifies the inputs, to tell a stale saved model
+        """
+        labels = list(examples)
+        docs = [(label_row, cls._features(text, n_features))
+                for label_row, label in enumerate(labels) for text in examples[label]]
+        df = np.zeros(n_features, dtype=np.float32)
+        for _, (buckets, _) in docs:
+            df[buckets] += 1
+        idf = (np.log((1 + len(docs)) / (1 + df)) + 1).astype(np.float32)
+
+        centroids = np.zeros((len(labels), n_features), dtype=np.float32)
+        for label_row, (buckets, tf) in docs:
+            weights = tf * idf[buckets]
+            norm = np.linalg.norm(weights)
+            if norm > 0:
+                centroids[label_row, buckets] += weights / norm
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        np.divide(centroids, norms, out=centroids, where=norms > 0)
+        return cls(labels, centroids, idf, fingerprint)
+
+    def scores(self, question: str) -> np.ndarray:
+        """Cosine similarity of the question to every intent"""
+        buckets, weights = self._vector(question)
+        # Only the question's own buckets are non-zero: multiply just those columns
+        return self.centroids[:, buckets] @ weights
+
+    def classify(self, question: str) -> IntentPrediction:
+        scores = self.scores(question)
+        best = int(np.argmax(scores))
+        return IntentPrediction(*self.labels[best], float(scores[best]))
+
+    def classify_batch(self, questions: Sequence[str]) -> List[IntentPrediction]:
+        """Classify many questions with one (questions, features) x (features, intents) product"""
+        if not questions:
+            return []
+        vectors = [self._vector(question) for question in questions]
+        # Only columns some question uses can contribute
+        columns, inverse = np.unique(np.concatenate([buckets for buckets, _ in vectors]), return_inverse=True)
+        matrix = np.zeros((len(questions), len(columns)), dtype=np.float32)
+        offset = 0
+        for row, (buckets, weights) in enumerate(vectors):
+            matrix[row, inverse[offset:offset + len(buckets)]] = weights
+            offset += len(buckets)
+        scores = matrix @ self.centroids[:, columns].T
+        best = np.argmax(scores, axis=1)
+        return [IntentPrediction(*self.labels[label_row], float(scores[row, label_row]))
+                for row, label_row in enumerate(best)]
+
+    @staticmethod
+    def fingerprint_of(*parts: Any) -> str:
+        """Stable digest of the inputs a model was built from"""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def save(self, persist_dir: str):
+        """Write the model, swapping files in atomically"""
+        os.makedirs(persist_dir, exist_ok=True)
+        tmp_paths = []
+        for name, array in ((CENTROIDS_FILE, self.centroids), (IDF_FILE, self.idf)):
+            tmp_path = os.path.join(persist_dir, name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, array)
+            tmp_paths.append(tmp_path)
+        tmp_path = os.path.join(persist_dir, LABELS_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"labels": self.labels, "fingerprint": self.fingerprint}, f)
+        tmp_paths.append(tmp_path)
+        for tmp_path in tmp_paths:
+            os.replace(tmp_path, tmp_path[:-len(".tmp")])
+
+    @classmethod
+    def load(cls, persist_dir: str, use_mmap: bool = True) -> Optional["IntentClassifier"]:
+        """Open a model written by ``save``; None if there is none"""
+        paths = [os.path.join(persist_dir, name) for name in (LABELS_FILE, CENTROIDS_FILE, IDF_FILE)]
+        if not all(os.path.exists(path) for path in paths):
+            return None
+        with open(paths[0], "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        mmap_mode = "r" if use_mmap else None
+        return cls([tuple(label) for label in meta["labels"]], np.load(paths[1], mmap_mode=mmap_mode),
+                   np.load(paths[2], mmap_mode=mmap_mode), meta["fingerprint"])
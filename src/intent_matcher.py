@@ -0,0 +1,116 @@
+"""
+Intent Matcher for HR Assistant Agent
+Compiles every intent pattern into one word-boundary regex so a question
+is scanned once, instead of once per pattern
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class IntentHit(NamedTuple):
+    """A single pattern occurrence found in a question"""
+    tier: str
+    intent: str
+    term: str
+    start: int
+    priority: Tuple[int, int]
+
+
+class IntentMatcher:
+    """Single-pass, word-boundary matcher over tiered intent patterns
+
+    Tiers are checked in the order they are added and intents within a tier
+    keep their insertion order, so ``best`` reproduces the old "first loop
+    that matches wins" behaviour without the nested loops.
+    """
+
+    def __init__(self):
+        self._tiers: List[str] = []
+        self._terms: Dict[str, Tuple[str, str, Tuple[int, int]]] = {}
+        # Plural form -> the pattern it stands for
+        self._plurals: Dict[str, str] = {}
+        self._intent_count = 0
+        self._regex: Optional[re.Pattern] = None
+
+    def add_tier(self, tier: str, intents: Dict[str, List[str]], plurals: bool = False):
+        """
+        Register a tier of intents
+
+        Args:
+            tier: Tier name, lower tiers added first take priority
+            intents: Mapping of intent name to its trigger patterns
+            plurals: Also match each pattern with an "s"/"es" suffix
+                ("sick leaves", "holidays"); off for greetings, where "his"
+                must not match "hi"
+        """
+        tier_rank = len(self._tiers)
+        self._tiers.append(tier)
+        for intent_rank, (intent, patterns) in enumerate(intents.items()):
+            for pattern in patterns:
+                term = " ".join(pattern.lower().split())
+                # The first registration of a term keeps the highest priority
+                if term and term not in self._terms:
+                    self._terms[term] = (tier, intent, (tier_rank, intent_rank))
+                if term and plurals:
+                    for plural in (term + "s", term + "es"):
+                        self._plurals.setdefault(plural, term)
+            self._intent_count += 1
+        self._regex = None
+
+    def compile(self) -> "IntentMatcher":
+        """Build the combined regex; called lazily on first match"""
+        if not self._terms:
+            self._regex = re.compile(r"(?!x)x")
+            return self
+        trie: Dict = {}
+        for term in {**self._plurals, **self._terms}:
+            node = trie
+            for char in term:
+                node = node.setdefault(char, {})
+            node[""] = True
+        self._regex = re.compile(r"\b(?P<term>" + self._trie_to_regex(trie) + r")\b")
+        return self
+
+    @classmethod
+    def _trie_to_regex(cls, node: Dict) -> str:
+        """Emit a prefix-factored alternation so shared prefixes are tested once"""
+        branches = [re.escape(char) + cls._trie_to_regex(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # Greedy optional prefers the longest pattern at each position
+            return "(?:" + body + ")?"
+        return body
+
+    def find_all(self, text: str) -> List[IntentHit]:
+        """Return every intent hit in ``text`` from a single left-to-right scan"""
+        if self._regex is None:
+            self.compile()
+        hits = []
+        for match in self._regex.finditer(text.lower()):
+            term = match.group("term")
+            # A pattern spelled like another's plural is still that pattern
+            term = term if term in self._terms else self._plurals[term]
+            tier, intent, priority = self._terms[term]
+            hits.append(IntentHit(tier, intent, term, match.start(), priority))
+        return hits
+
+    def best(self, text: str) -> Optional[IntentHit]:
+        """Return the highest-priority hit in ``text``, or None"""
+        hits = self.find_all(text)
+        if not hits:
+            return None
+        return min(hits, key=lambda hit: hit.priority)
+
+    @property
+    def intent_count(self) -> int:
+        """Number of registered intents across all tiers"""
+        return self._intent_count
+
+    @property
+    def pattern_count(self) -> int:
+        """Number of distinct patterns in the compiled index"""
+        return len(self._terms)
@@ -0,0 +1,204 @@
+"""
+Lexical Index for HR Assistant Agent
+BM25 inverted index over policy chunks, persisted as memory-mappable arrays
+next to the FAISS store, plus reciprocal rank fusion for hybrid retrieval
+"""
+
+import os
+import re
+import json
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from answer_cache import STOPWORDS
+
+
+TERMS_FILE = "bm25.json"
+INDPTR_FILE = "bm25.indptr.npy"
+POSTINGS_FILE = "bm25.postings.npy"
+WEIGHTS_FILE = "bm25.weights.npy"
+
+# Words, and numbers with their separators kept: "5,00,000", "1.5", "8.15"
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms without stopwords, with a plain plural 's' removed"""
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = 60) -> List[str]:
+    """
+    Merge ranked ID lists by summing 1 / (k + rank) over the lists
+
+    Args:
+        rankings: Ranked lists of document IDs, best first
+        k: Damping constant; larger values flatten the top ranks
+
+    Returns:
+        Every ID, best fused score first
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of chunks
+
+    Postings are stored CSR-style per term (``indptr``, ``postings``) with
+    the full BM25 weight of each (term, chunk) pair precomputed, so a query
+    is one scatter-add per query term.
+    """
+
+    def __init__(self, terms: Dict[str, int], ids: List[str], idf: np.ndarray,
+                 indptr: np.ndarray, postings: np.ndarray, weights: np.ndarray,
+                 k1: float = 1.5, b: float = 0.75):
+        self.terms = terms
+        self.ids = ids
+        self.idf = idf
+        self.indptr = indptr
+        self.postings = postings
+        self.weights = weights
+        self.k1 = k1
+        self.b = b
+        self._rows = {doc_id: row for row, doc_id in enumerate(ids)}
+
+    @classmethod
+    def build(cls, documents: Iterable[Document], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """
+        Index documents, keyed by their docstore IDs
+
+        Args:
+            documents: Chunks with ``id`` set, in FAISS row order
+            k1: Term-frequency saturation
+            b: Length normalization strength
+        """
+        ids, lengths, counts = [], [], []
+        terms: Dict[str, int] = {}
+        for doc in documents:
+            tokens = tokenize(doc.page_content)
+            ids.append(doc.id)
+            lengths.append(len(tokens))
+            counts.append(Counter(terms.setdefault(token, len(terms)) for token in tokens))
+
+        term_ids = np.fromiter((t for c in counts for t in c), dtype=np.int64)
+        doc_rows = np.fromiter((row for row, c in enumerate(counts) for _ in c), dtype=np.int32)
+        tfs = np.fromiter((tf for c in counts for tf in c.values()), dtype=np.float32)
+
+        n_docs = len(ids)
+        df = np.bincount(term_ids, minlength=len(terms)).astype(np.float32)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        lengths = np.asarray(lengths, dtype=np.float32)
+        avg_length = float(lengths.mean()) if n_docs and lengths.mean() > 0 else 1.0
+        norm = k1 * (1 - b + b * lengths[doc_rows] / avg_length)
+        weights = idf[term_ids] * tfs * (k1 + 1) / (tfs + norm)
+
+        order = np.argsort(term_ids, kind="stable")
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(df.astype(np.int64), out=indptr[1:])
+        return cls(terms, ids, idf, indptr, doc_rows[order], weights[order].astype(np.float32), k1, b)
+
+    def search(self, query: str, k: int = 10, rows: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """
+        The ``k`` best-scoring chunk IDs for a query, best first
+
+        Args:
+            query: Question text
+            k: Number of results
+            rows: Only consider these chunk rows (FAISS row order), if given
+        """
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.terms.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            # A term posts each chunk once, so fancy-index add is safe
+            scores[self.postings[start:end]] += self.weights[start:end]
+        if rows is not None:
+            allowed = np.zeros(len(self.ids), dtype=bool)
+            allowed[rows] = True
+            scores[~allowed] = 0.0
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.ids[row], float(scores[row])) for row in top]
+
+    def coverage(self, query: str, doc_id: str) -> float:
+        """
+        Share of the query's IDF mass whose terms occur in a chunk
+
+        Terms missing from the corpus count with the highest possible IDF,
+        so questions using words the documents never use score low.
+        """
+        row = self._rows.get(doc_id)
+        query_terms = set(tokenize(query))
+        if row is None or not query_terms:
+            return 0.0
+        unseen_idf = math.log1p((len(self.ids) + 0.5) / 0.5)
+        total = matched = 0.0
+        for term in query_terms:
+            term_id = self.terms.get(term)
+            if term_id is None:
+                total += unseen_idf
+                continue
+            idf = float(self.idf[term_id])
+            total += idf
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            if row in self.postings[start:end]:
+                matched += idf
+        return matched / total if total else 0.0
+
+    def save(self, persist_dir: str):
+        """Write the index next to the vector store, swapping files in atomically"""
+        os.makedirs(persist_dir, exist_ok=True)
+        tmp_paths = []
+        for name, array in ((INDPTR_FILE, self.indptr), (POSTINGS_FILE, self.postings),
+                            (WEIGHTS_FILE, self.weights)):
+            tmp_path = os.path.join(persist_dir, name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, array)
+            tmp_paths.append(tmp_path)
+        tmp_path = os.path.join(persist_dir, TERMS_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "ids": self.ids,
+                       "terms": sorted(self.terms, key=self.terms.get),
+                       "idf": self.idf.tolist()}, f, ensure_ascii=False)
+        tmp_paths.append(tmp_path)
+        for tmp_path in tmp_paths:
+            os.replace(tmp_path, tmp_path[:-len(".tmp")])
+
+    @staticmethod
+    def exists(persist_dir: str) -> bool:
+        return all(os.path.exists(os.path.join(persist_dir, name))
+                   for name in (TERMS_FILE, INDPTR_FILE, POSTINGS_FILE, WEIGHTS_FILE))
+
+    @classmethod
+    def load(cls, persist_dir: str, use_mmap: bool = True) -> Optional["BM25Index"]:
+        """Open an index written by ``save``; None if there is none"""
+        if not cls.exists(persist_dir):
+            return None
+        with open(os.path.join(persist_dir, TERMS_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        mmap_mode = "r" if use_mmap else None
+        arrays = [np.load(os.path.join(persist_dir, name), mmap_mode=mmap_mode)
+                  for name in (INDPTR_FILE, POSTINGS_FILE, WEIGHTS_FILE)]
+        terms = {term: term_id for term_id, term in enumerate(meta["terms"])}
+        return cls(terms, meta["ids"], np.asarray(meta["idf"], dtype=np.float32), *arrays,
+                   k1=meta["k1"], b=meta["b"])
@@ -0,0 +1,116 @@
+"""
+Micro-Batching Embeddings for HR Assistant Agent
+Groups concurrent async query embeddings into a single embedding call
+"""
+
+import asyncio
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from embedding_cache import embed_queries
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the batching queue is full and the caller should back off"""
+
+
+class MicroBatchingEmbeddings(Embeddings):
+    """Embeddings wrapper that batches concurrent ``aembed_query`` calls
+
+    The first queued query opens a window of ``window_ms``; every query that
+    arrives before the window closes (up to ``max_batch``) is embedded in
+    the same call, as queries (see ``embedding_cache.embed_queries``).
+    Synchronous calls pass straight through. At most ``max_inflight``
+    batches are embedding at once; further queries wait in the queue,
+    which holds at most ``max_queue`` of them, past which ``aembed_query``
+    raises QueueFullError instead of queueing.
+    """
+
+    def __init__(self, embeddings: Embeddings, window_ms: float = 5.0, max_batch: int = 64,
+                 max_queue: int = 1024, max_inflight: int = 4):
+        self.embeddings = embeddings
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.max_inflight = max_inflight
+        self.batches = 0
+        self.queries = 0
+        self.rejected = 0
+        self._queue: Optional["asyncio.Queue[Tuple[str, asyncio.Future]]"] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Semaphore] = None
+        # Running batch tasks; the loop only keeps weak references to them
+        self._tasks: Set[asyncio.Task] = set()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self._worker is None or self._worker.done():
+            # Bound to the running loop on first use
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._inflight = asyncio.Semaphore(self.max_inflight)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((text, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError("embedding queue is full") from None
+        return await future
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Stop draining the queue while every batch slot is busy, so it
+            # fills up and callers get QueueFullError
+            await self._inflight.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Embedding runs on a thread; the next window fills meanwhile
+            task = loop.create_task(self._embed_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _embed_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        self.batches += 1
+        self.queries += len(batch)
+        try:
+            vectors = await asyncio.to_thread(embed_queries, self.embeddings, [text for text, _ in batch])
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+        except Exception as e:
+            # The error goes to every caller waiting on this batch
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._inflight.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Batching metrics"""
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "avg_batch_size": self.queries / self.batches if self.batches else 0.0,
+            "rejected": self.rejected,
+            "queue_depth": self.queue_depth,
+            "inflight": len(self._tasks),
+        }
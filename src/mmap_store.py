@@ -0,0 +1,142 @@
+"""
+Memory-Mapped Vector Store for HR Assistant Agent
+Pickle-free persisted format: vectors in a FAISS file opened with mmap, chunk
+text and metadata in an offset-indexed JSON-lines file
+"""
+
+import os
+import json
+import mmap
+from typing import Dict, Iterator, List, Union
+
+import faiss
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+
+INDEX_FILE = "index.faiss"
+DOCS_FILE = "docs.jsonl"
+OFFSETS_FILE = "docs.offsets.npy"
+IDS_FILE = "ids.json"
+
+# IO_FLAG_MMAP_IFC maps flat/IVF/HNSW codes; plain IO_FLAG_MMAP still copies them
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+class OffsetDocstore(Docstore):
+    """Read-only docstore that decodes one JSON line per lookup from a mmap
+
+    Nothing is deserialized up front, and every process reading the same
+    file shares its pages through the OS page cache.
+    """
+
+    def __init__(self, persist_dir: str, ids: List[str]):
+        self._file = open(os.path.join(persist_dir, DOCS_FILE), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._offsets = np.load(os.path.join(persist_dir, OFFSETS_FILE), mmap_mode="r")
+        self._rows = {doc_id: row for row, doc_id in enumerate(ids)}
+
+    def search(self, search: str) -> Union[str, Document]:
+        row = self._rows.get(search)
+        if row is None:
+            return f"ID {search} not found."
+        record = json.loads(self._data[int(self._offsets[row]):int(self._offsets[row + 1])])
+        return Document(id=search, page_content=record["text"], metadata=record["metadata"])
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+def iter_documents(vectorstore: FAISS) -> Iterator[Document]:
+    """Yield the store's documents in FAISS row order"""
+    for row in range(vectorstore.index.ntotal):
+        doc_id = vectorstore.index_to_docstore_id[row]
+        doc = vectorstore.docstore.search(doc_id)
+        yield Document(id=doc_id, page_content=doc.page_content, metadata=doc.metadata)
+
+
+def save_vector_store(vectorstore: FAISS, persist_dir: str):
+    """
+    Write a vector store in the pickle-free format
+
+    Each file is written to a temporary name and swapped in atomically, so
+    processes that still have the old files mapped keep a consistent view.
+
+    Args:
+        vectorstore: Store to persist
+        persist_dir: Target directory
+    """
+    os.makedirs(persist_dir, exist_ok=True)
+    ids, offsets = [], [0]
+    docs_tmp = os.path.join(persist_dir, DOCS_FILE + ".tmp")
+    with open(docs_tmp, "wb") as f:
+        for doc in iter_documents(vectorstore):
+            line = json.dumps({"text": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False)
+            f.write(line.encode("utf-8") + b"\n")
+            offsets.append(f.tell())
+            ids.append(doc.id)
+
+    index_tmp = os.path.join(persist_dir, INDEX_FILE + ".tmp")
+    faiss.write_index(vectorstore.index, index_tmp)
+    offsets_tmp = os.path.join(persist_dir, OFFSETS_FILE + ".tmp")
+    with open(offsets_tmp, "wb") as f:
+        np.save(f, np.asarray(offsets, dtype=np.int64))
+    ids_tmp = os.path.join(persist_dir, IDS_FILE + ".tmp")
+    with open(ids_tmp, "w", encoding="utf-8") as f:
+        json.dump(ids, f)
+
+    for tmp_path in (docs_tmp, offsets_tmp, ids_tmp, index_tmp):
+        os.replace(tmp_path, tmp_path[:-len(".tmp")])
+    # Drop the pickled docstore left behind by FAISS.save_local, if any
+    legacy_pickle = os.path.join(persist_dir, "index.pkl")
+    if os.path.exists(legacy_pickle):
+        os.remove(legacy_pickle)
+
+
+def has_vector_store(persist_dir: str) -> bool:
+    """Whether ``persist_dir`` holds a store in this format"""
+    return all(os.path.exists(os.path.join(persist_dir, name))
+               for name in (INDEX_FILE, DOCS_FILE, OFFSETS_FILE, IDS_FILE))
+
+
+def load_vector_store(persist_dir: str, embeddings: Embeddings, use_mmap: bool = True) -> FAISS:
+    """
+    Open a store written by ``save_vector_store``
+
+    Args:
+        persist_dir: Directory holding the store
+        embeddings: Embedding model used for queries
+        use_mmap: Map vectors and documents read-only (serving); when False,
+            load everything into memory so the store can be updated
+
+    Returns:
+        A LangChain FAISS vector store
+    """
+    with open(os.path.join(persist_dir, IDS_FILE), "r", encoding="utf-8") as f:
+        ids = json.load(f)
+    index_path = os.path.join(persist_dir, INDEX_FILE)
+    index_to_docstore_id: Dict[int, str] = dict(enumerate(ids))
+
+    if use_mmap:
+        index = faiss.read_index(index_path, MMAP_FLAGS)
+        docstore = OffsetDocstore(persist_dir, ids)
+    else:
+        index = faiss.read_index(index_path)
+        documents = {}
+        with open(os.path.join(persist_dir, DOCS_FILE), "r", encoding="utf-8") as f:
+            for doc_id, line in zip(ids, f):
+                record = json.loads(line)
+                documents[doc_id] = Document(id=doc_id, page_content=record["text"], metadata=record["metadata"])
+        docstore = InMemoryDocstore(documents)
+
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id
+    )
@@ -0,0 +1,208 @@
+"""
+Reranker for HR Assistant Agent
+Second-stage scoring of over-fetched retrieval candidates, so the exact
+policy section can overtake a near miss that happened to embed closer
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from lexical_index import BM25Index, tokenize
+
+
+def _hashes(items) -> np.ndarray:
+    return np.unique(np.fromiter((hash(item) for item in items), dtype=np.int64))
+
+
+class LexicalOverlapReranker:
+    """IDF-weighted query term and bigram overlap, scored in one NumPy pass
+
+    A candidate's score is the share of the query's IDF mass it contains
+    plus ``bigram_weight`` times the share of query bigrams it contains, so
+    a section using the question's exact phrasing ("notice period") beats
+    one that merely shares its topic. IDF comes from the BM25 index when
+    given, otherwise from the candidate batch itself. Term sets of chunks
+    are cached by chunk ID.
+    """
+
+    def __init__(self, lexical_index: Optional[BM25Index] = None, bigram_weight: float = 0.5,
+                 cache_size: int = 4096):
+        self.lexical_index = lexical_index
+        self.bigram_weight = bigram_weight
+        self.cache_size = cache_size
+        self._terms: "OrderedDict[Any, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _chunk_terms(self, document: Document) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted unique (term hashes, bigram hashes) of a chunk"""
+        key = document.id or document.page_content
+        with self._lock:
+            cached = self._terms.get(key)
+            if cached is not None:
+                self._terms.move_to_end(key)
+                return cached
+        tokens = tokenize(document.page_content)
+        terms = (_hashes(tokens), _hashes(zip(tokens, tokens[1:])))
+        with self._lock:
+            self._terms[key] = terms
+            if len(self._terms) > self.cache_size:
+                self._terms.popitem(last=False)
+        return terms
+
+    def _idf(self, query_terms: List[str], presence: np.ndarray) -> np.ndarray:
+        if self.lexical_index is None:
+            n_docs = presence.shape[0]
+            df = presence.sum(axis=0)
+            return np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        # Terms the corpus never uses get the highest possible IDF, as in BM25Index.coverage
+        unseen = np.log1p((len(self.lexical_index.ids) + 0.5) / 0.5)
+        term_ids = [self.lexical_index.terms.get(term) for term in query_terms]
+        return np.asarray([self.lexical_index.idf[t] if t is not None else unseen for t in term_ids])
+
+    @staticmethod
+    def _presence(query: np.ndarray, chunks: List[np.ndarray]) -> np.ndarray:
+        """(candidates, query items) 0/1 matrix of which query items each chunk holds"""
+        presence = np.zeros((len(chunks), len(query)), dtype=np.float32)
+        if not len(query):
+            return presence
+        flat = np.concatenate(chunks)
+        rows = np.repeat(np.arange(len(chunks)), [len(c) for c in chunks])
+        cols = np.minimum(np.searchsorted(query, flat), len(query) - 1)
+        hit = query[cols] == flat
+        presence[rows[hit], cols[hit]] = 1.0
+        return presence
+
+    def score(self, query: str, documents: List[Document]) -> np.ndarray:
+        """Relevance of each document to the query, higher is better"""
+        if not documents:
+            return np.zeros(0, dtype=np.float32)
+        tokens = tokenize(query)
+        terms = sorted(set(tokens), key=hash)
+        term_hashes = np.fromiter((hash(term) for term in terms), dtype=np.int64)
+        bigram_hashes = _hashes(zip(tokens, tokens[1:]))
+        chunk_terms = [self._chunk_terms(doc) for doc in documents]
+
+        term_presence = self._presence(term_hashes, [t for t, _ in chunk_terms])
+        idf = self._idf(terms, term_presence).astype(np.float32)
+        scores = term_presence @ idf / idf.sum() if idf.sum() > 0 else np.zeros(len(documents), np.float32)
+        if len(bigram_hashes):
+            bigram_presence = self._presence(bigram_hashes, [b for _, b in chunk_terms])
+            scores = scores + self.bigram_weight * bigram_presence.mean(axis=1)
+        return scores
+
+
+class CrossEncoderReranker:
+    """Local CPU cross-encoder (sentence-transformers), reading query and chunk together
+
+    Much more accurate than term overlap, and much slower: pair it with a
+    latency budget.
+    """
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", batch_size: int = 32):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise ImportError("CrossEncoderReranker needs sentence-transformers "
+                              "(pip install sentence-transformers)") from e
+        self.model = CrossEncoder(model_name, device="cpu")
+        self.batch_size = batch_size
+
+    def score(self, query: str, documents: List[Document]) -> np.ndarray:
+        if not documents:
+            return np.zeros(0, dtype=np.float32)
+        pairs = [(query, doc.page_content) for doc in documents]
+        return np.asarray(self.model.predict(pairs, batch_size=self.batch_size), dtype=np.float32)
+
+
+class RerankingStage:
+    """Reorders over-fetched candidates with a reranker, within a latency budget
+
+    Retrieval fetches ``k * depth`` candidates; the reranker's scores pick
+    the final ``k`` (ties keep retrieval order). When the time already spent
+    on the query plus the reranker's expected cost (a moving average per
+    candidate) would exceed ``budget_ms``, the candidates are returned in
+    retrieval order instead. Each skip scales the estimate by ``skip_decay``,
+    so one slow call cannot disable reranking for good: the stage tries
+    again once the estimate fits, and a reranker that is still slow pushes
+    it back up.
+    """
+
+    def __init__(self, reranker, depth: int = 4, budget_ms: Optional[float] = None,
+                 smoothing: float = 0.2, skip_decay: float = 0.9):
+        self.reranker = reranker
+        self.depth = depth
+        self.budget_ms = budget_ms
+        self.smoothing = smoothing
+        self.skip_decay = skip_decay
+        self._lock = threading.Lock()
+        self._cost_per_candidate: Optional[float] = None
+        self.reranked = 0
+        self.skipped = 0
+        self.seconds = 0.0
+        self.candidates = 0
+        self.top_changed = 0
+        self.promoted = 0
+        self.displacement = 0
+
+    def expected_seconds(self, n_candidates: int) -> float:
+        return (self._cost_per_candidate or 0.0) * n_candidates
+
+    def rerank(self, query: str, candidates: List[Document], k: int, elapsed: float = 0.0) -> List[Document]:
+        """
+        The best ``k`` candidates for the query
+
+        Args:
+            query: Question text
+            candidates: Retrieval results, best first
+            k: Number of documents to keep
+            elapsed: Seconds already spent on this query (embedding, search)
+        """
+        if len(candidates) <= 1:
+            return candidates[:k]
+        if (self.budget_ms is not None
+                and (elapsed + self.expected_seconds(len(candidates))) * 1000 > self.budget_ms):
+            with self._lock:
+                self.skipped += 1
+                if self._cost_per_candidate is not None:
+                    self._cost_per_candidate *= self.skip_decay
+            return candidates[:k]
+
+        started = time.perf_counter()
+        scores = np.asarray(self.reranker.score(query, candidates))
+        order = np.argsort(-scores, kind="stable")[:k]
+        seconds = time.perf_counter() - started
+
+        with self._lock:
+            cost = seconds / len(candidates)
+            # A call over budget counts in full, so a reranker that stays slow is retried rarely
+            over_budget = self.budget_ms is not None and (elapsed + seconds) * 1000 > self.budget_ms
+            self._cost_per_candidate = cost if self._cost_per_candidate is None or over_budget else \
+                (1 - self.smoothing) * self._cost_per_candidate + self.smoothing * cost
+            self.reranked += 1
+            self.seconds += seconds
+            self.candidates += len(candidates)
+            self.top_changed += int(order[0] != 0)
+            self.promoted += int(np.count_nonzero(order >= k))
+            self.displacement += int(np.abs(order - np.arange(len(order))).sum())
+        return [candidates[i] for i in order]
+
+    def stats(self) -> Dict[str, Any]:
+        """Reranker cost and how much it changes the retrieval order"""
+        kept = self.reranked or 1
+        return {
+            "reranked": self.reranked,
+            "skipped": self.skipped,
+            "mean_ms": self.seconds / kept * 1000,
+            "mean_candidates": self.candidates / kept,
+            # Queries whose first document changed
+            "top_changed_rate": self.top_changed / kept,
+            # Documents per query pulled into the top k from below it
+            "mean_promoted": self.promoted / kept,
+            # Mean |new rank - old rank| summed over the kept documents
+            "mean_displacement": self.displacement / kept,
+        }
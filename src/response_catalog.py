@@ -0,0 +1,110 @@
+"""
+Response Catalog for HR Assistant Agent
+Canned answers, conversational patterns and HR keywords loaded from a JSON
+file once per process into an immutable structure with its intent matcher
+already compiled, and swapped for a new one when the file changes
+"""
+
+import os
+import json
+import time
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple
+
+from intent_matcher import IntentMatcher
+
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(__file__), "response_catalog.json")
+
+
+class ResponseCatalog(NamedTuple):
+    """One loaded version of the catalog file; never mutated after loading"""
+    # Topic keyword -> canned answer
+    topics: Mapping[str, str]
+    # Intent -> {"patterns": (...), "responses": (...)}
+    conversational: Mapping[str, Mapping[str, Tuple[str, ...]]]
+    hr_keywords: Tuple[str, ...]
+    # "hr_related" / "not_hr_related" -> answer when nothing else matches
+    fallbacks: Mapping[str, str]
+    # Conversational patterns, topic keywords and HR keywords, in tier order
+    matcher: IntentMatcher
+    path: str
+    # File modification time (ns) this version was read at
+    version: int
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], path: str = "", version: int = 0) -> "ResponseCatalog":
+        conversational = MappingProxyType({
+            intent: MappingProxyType({"patterns": tuple(entry["patterns"]), "responses": tuple(entry["responses"])})
+            for intent, entry in data.get("conversational", {}).items()
+        })
+        topics = MappingProxyType(dict(data.get("topics", {})))
+        hr_keywords = tuple(data.get("hr_keywords", ()))
+
+        matcher = IntentMatcher()
+        matcher.add_tier("conversational", {intent: list(entry["patterns"])
+                                            for intent, entry in conversational.items()})
+        matcher.add_tier("topic", {keyword: [keyword] for keyword in topics}, plurals=True)
+        matcher.add_tier("hr_keyword", {"hr_related": list(hr_keywords)}, plurals=True)
+        return cls(topics, conversational, hr_keywords, MappingProxyType(dict(data.get("fallbacks", {}))),
+                   matcher.compile(), path, version)
+
+    @classmethod
+    def from_file(cls, path: str) -> "ResponseCatalog":
+        version = os.stat(path).st_mtime_ns
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f), path=path, version=version)
+
+
+class _CatalogSlot:
+    """The current catalog for one path, re-checked at most every check_interval seconds"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.catalog = ResponseCatalog.from_file(path)
+        # Modification time last read, loaded or not
+        self.seen_version = self.catalog.version
+        self.checked_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def current(self, check_interval: float) -> ResponseCatalog:
+        now = time.monotonic()
+        if now - self.checked_at < check_interval:
+            return self.catalog
+        with self.lock:
+            if now - self.checked_at >= check_interval:
+                self.checked_at = now
+                try:
+                    version = os.stat(self.path).st_mtime_ns
+                    if version != self.seen_version:
+                        self.seen_version = version
+                        self.catalog = ResponseCatalog.from_file(self.path)
+                        print(f"Reloaded response catalog from {self.path}")
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    # A missing, half-written or broken file keeps the last good version
+                    print(f"Keeping previous response catalog: {e}")
+        return self.catalog
+
+
+_slots: Dict[str, _CatalogSlot] = {}
+_slots_lock = threading.Lock()
+
+
+def get_catalog(path: Optional[str] = None, check_interval: float = 1.0) -> ResponseCatalog:
+    """
+    The process-wide catalog for a file, loaded on first use
+
+    Every caller shares the same immutable object. When the file's
+    modification time changes, the next call after ``check_interval``
+    seconds loads the new version and swaps it in; callers holding the
+    old one keep a consistent view.
+    """
+    path = os.path.abspath(path or DEFAULT_CATALOG_PATH)
+    slot = _slots.get(path)
+    if slot is None:
+        with _slots_lock:
+            slot = _slots.get(path)
+            if slot is None:
+                slot = _slots[path] = _CatalogSlot(path)
+    return slot.current(check_interval)
@@ -0,0 +1,120 @@
+"""
+Section Splitter for HR Assistant Agent
+Header-aware chunking of Markdown-style policy documents: sections stay
+whole, carry their heading path, and never overlap each other
+"""
+
+import re
+from typing import List, Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+
+# (heading path, section text)
+Section = Tuple[Tuple[str, ...], str]
+
+
+class MarkdownSectionSplitter:
+    """Split documents at ``#``..``###`` headings instead of fixed windows
+
+    Consecutive whole sections sharing their first ``pack_level`` headings
+    (by default: the same document title) are packed into one chunk while
+    they fit in ``chunk_size``, so short sections do not become tiny vectors
+    and no section is cut in two. A section longer than ``chunk_size`` is
+    split on its own, with ``chunk_overlap`` applied only inside it. Each
+    chunk records its heading path ("Company HR Policies > Leave Policy >
+    Sick Leave", or the path shared by all of its sections) as the
+    ``section`` metadata and the titles it covers as ``headings``.
+    """
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, max_heading_level: int = 3,
+                 pack_level: int = 1):
+        self.chunk_size = chunk_size
+        self.max_heading_level = max_heading_level
+        self.pack_level = pack_level
+        self._oversized_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=len,
+            separators=["\n\n", "\n", " ", ""]
+        )
+
+    def split_sections(self, text: str) -> List[Section]:
+        """Cut text at headings; a heading with no body joins the next section"""
+        sections: List[Section] = []
+        stack: List[Tuple[int, str]] = []
+        lines: List[str] = []
+        has_body = False
+
+        def flush():
+            if has_body:
+                sections.append((tuple(title for _, title in stack), "\n".join(lines).strip()))
+
+        for line in text.splitlines():
+            match = _HEADING.match(line)
+            if match and len(match.group(1)) <= self.max_heading_level:
+                if has_body:
+                    flush()
+                    lines, has_body = [], False
+                level = len(match.group(1))
+                while stack and stack[-1][0] >= level:
+                    stack.pop()
+                stack.append((level, match.group(2)))
+                lines.append(line)
+            else:
+                lines.append(line)
+                has_body = has_body or bool(line.strip())
+        flush()
+        return sections
+
+    def split_text(self, text: str) -> List[Tuple[Tuple[str, ...], List[str], str]]:
+        """
+        Pack sections into chunks
+
+        Returns:
+            (common heading path, section titles, chunk text) per chunk
+        """
+        chunks = []
+        group: List[Section] = []
+        group_size = 0
+
+        def emit():
+            if not group:
+                return
+            paths = [path for path, _ in group]
+            common = paths[0]
+            for path in paths[1:]:
+                common = common[:next((i for i, (a, b) in enumerate(zip(common, path)) if a != b),
+                                      min(len(common), len(path)))]
+            chunks.append((common, [path[-1] for path in paths if path], "\n\n".join(body for _, body in group)))
+
+        for path, body in self.split_sections(text):
+            if len(body) > self.chunk_size:
+                emit()
+                group, group_size = [], 0
+                for piece in self._oversized_splitter.split_text(body):
+                    chunks.append((path, [path[-1]] if path else [], piece))
+                continue
+            same_parent = group and group[-1][0][:self.pack_level] == path[:self.pack_level]
+            if same_parent and group_size + 2 + len(body) <= self.chunk_size:
+                group.append((path, body))
+                group_size += 2 + len(body)
+            else:
+                emit()
+                group, group_size = [(path, body)], len(body)
+        emit()
+        return chunks
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """Split documents, copying each one's metadata onto its chunks"""
+        chunks = []
+        for document in documents:
+            for path, titles, text in self.split_text(document.page_content):
+                metadata = dict(document.metadata)
+                metadata["section"] = " > ".join(path)
+                metadata["headings"] = titles
+                chunks.append(Document(page_content=text, metadata=metadata))
+        return chunks
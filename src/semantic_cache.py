@@ -0,0 +1,184 @@
+"""
+Semantic Cache for HR Assistant Agent
+Reuses answers for paraphrased questions via a small vector index of
+previously answered questions
+"""
+
+import os
+import json
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Mapping
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+
+class SemanticCache:
+    """Embedding-similarity answer cache with LRU eviction
+
+    Each entry remembers the content hash of every source document its
+    answer was built from. An entry whose sources have since changed (or
+    disappeared) is dropped on lookup instead of being served.
+    """
+
+    INDEX_FILE = "questions.faiss"
+    ENTRIES_FILE = "entries.json"
+
+    def __init__(self, embeddings: Embeddings, threshold: float = 0.92, max_entries: int = 512,
+                 persist_dir: Optional[str] = None):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.persist_dir = persist_dir
+        self.hits = 0
+        self.misses = 0
+        self.stale_drops = 0
+        self._index: Optional[faiss.IndexIDMap2] = None
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        if persist_dir and os.path.exists(os.path.join(persist_dir, self.ENTRIES_FILE)):
+            self.load()
+
+    def _embed(self, question: str) -> np.ndarray:
+        """Unit-length query vector, so inner product is cosine similarity"""
+        return self._normalize(self.embeddings.embed_query(question))
+
+    async def _aembed(self, question: str) -> np.ndarray:
+        return self._normalize(await self.embeddings.aembed_query(question))
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray([embedding], dtype=np.float32)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _remove(self, entry_id: int):
+        del self._entries[entry_id]
+        self._index.remove_ids(np.asarray([entry_id], dtype=np.int64))
+
+    def lookup(self, question: str, source_versions: Mapping[str, str],
+               embedding: Optional[List[float]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a question similar enough to this one
+
+        Args:
+            question: User's question
+            source_versions: Current content hash of every indexed source file
+            embedding: The question's embedding, if already computed
+
+        Returns:
+            The cached entry (answer, source_documents, question, score) or None
+        """
+        vector = self._normalize(embedding) if embedding is not None else self._embed(question)
+        return self._search(vector, source_versions)
+
+    async def alookup(self, question: str, source_versions: Mapping[str, str]) -> Optional[Dict[str, Any]]:
+        """Like ``lookup``, but embeds the question without blocking the event loop"""
+        return self._search(await self._aembed(question), source_versions)
+
+    def _search(self, vector: np.ndarray, source_versions: Mapping[str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                self.misses += 1
+                return None
+            scores, ids = self._index.search(vector, 1)
+            score, entry_id = float(scores[0][0]), int(ids[0][0])
+            entry = self._entries.get(entry_id)
+            if entry is None or score < self.threshold:
+                self.misses += 1
+                return None
+            if any(source_versions.get(source) != version
+                   for source, version in entry["versions"].items()):
+                # Policy text changed since this answer was produced
+                self._remove(entry_id)
+                self.stale_drops += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return {
+                "answer": entry["answer"],
+                "source_documents": [Document(**doc) for doc in entry["source_documents"]],
+                "question": entry["question"],
+                "score": score,
+            }
+
+    def store(self, question: str, answer: str, source_documents: List[Document],
+              source_versions: Mapping[str, str], embedding: Optional[List[float]] = None):
+        """
+        Remember an answer, pinned to the current version of its sources
+
+        Args:
+            question: The question that was answered
+            answer: The answer text
+            source_documents: Chunks the answer was built from
+            source_versions: Current content hash of every indexed source file
+            embedding: The question's embedding, if already computed
+        """
+        vector = self._normalize(embedding) if embedding is not None else self._embed(question)
+        self._insert(vector, question, answer, source_documents, source_versions)
+
+    async def astore(self, question: str, answer: str, source_documents: List[Document],
+                     source_versions: Mapping[str, str]):
+        """Like ``store``, but embeds the question without blocking the event loop"""
+        self._insert(await self._aembed(question), question, answer, source_documents, source_versions)
+
+    def _insert(self, vector: np.ndarray, question: str, answer: str, source_documents: List[Document],
+                source_versions: Mapping[str, str]):
+        sources = {doc.metadata.get("source_file", doc.metadata.get("source")) for doc in source_documents}
+        versions = {source: source_versions.get(source) for source in sources if source}
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+            while len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.asarray([entry_id], dtype=np.int64))
+            self._entries[entry_id] = {
+                "question": question,
+                "answer": answer,
+                "source_documents": [
+                    {"page_content": doc.page_content, "metadata": doc.metadata} for doc in source_documents
+                ],
+                "versions": versions,
+            }
+
+    def save(self):
+        """Persist the question index and entries (no pickle)"""
+        if not self.persist_dir or self._index is None:
+            return
+        os.makedirs(self.persist_dir, exist_ok=True)
+        with self._lock:
+            faiss.write_index(self._index, os.path.join(self.persist_dir, self.INDEX_FILE))
+            with open(os.path.join(self.persist_dir, self.ENTRIES_FILE), "w", encoding="utf-8") as f:
+                json.dump({"next_id": self._next_id, "entries": list(self._entries.items())}, f)
+
+    def load(self):
+        """Load a cache written by ``save``"""
+        with open(os.path.join(self.persist_dir, self.ENTRIES_FILE), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self._index = faiss.read_index(os.path.join(self.persist_dir, self.INDEX_FILE))
+        self._next_id = data["next_id"]
+        self._entries = OrderedDict((int(entry_id), entry) for entry_id, entry in data["entries"])
+
+    def clear(self):
+        """Drop every cached answer"""
+        with self._lock:
+            self._entries.clear()
+            self._index = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate metrics for the cache"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+            "stale_drops": self.stale_drops,
+        }
@@ -0,0 +1,266 @@
+"""
+HTTP Server for HR Assistant Agent
+Headless JSON API for programmatic clients (chat bots, portals), served from
+one asyncio event loop with keep-alive connections
+
+Usage: python src/server.py [--host 127.0.0.1] [--port 8080] [--fake]
+
+    POST /ask     {"question": "...", "conversation_id": "...", "category": "..."}
+    GET  /health  queue depth and cache/batching statistics
+"""
+
+import os
+import json
+import asyncio
+import argparse
+from typing import Dict, Any, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from hr_agent import HRAssistantAgent
+from document_processor import DocumentProcessor
+from micro_batcher import MicroBatchingEmbeddings, QueueFullError
+from fake_backends import FakeEmbeddings, FakeStreamingLLM
+
+
+MAX_BODY_BYTES = 64 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class MalformedRequestError(ValueError):
+    """The request line or headers cannot be parsed"""
+
+
+class HRAssistantServer:
+    """Minimal HTTP/1.1 JSON server around ``HRAssistantAgent.aask``
+
+    Connections are kept alive until the client closes them or sits idle
+    for ``keep_alive_timeout`` seconds. At most ``max_inflight`` questions
+    are answered at once; further requests get 503 with Retry-After rather
+    than queueing without bound.
+    """
+
+    def __init__(self, agent: HRAssistantAgent, batcher: Optional[MicroBatchingEmbeddings] = None,
+                 max_inflight: int = 512, keep_alive_timeout: float = 15.0):
+        self.agent = agent
+        self.batcher = batcher
+        self.max_inflight = max_inflight
+        self.keep_alive_timeout = keep_alive_timeout
+        self.inflight = 0
+        self.served = 0
+        self.rejected = 0
+        self.errors = 0
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"HR Assistant API listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), self.keep_alive_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except MalformedRequestError as e:
+                    # Framing is lost, so answer and close the connection
+                    self._write_response(writer, 400, {"error": f"malformed request: {e}"}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body, keep_alive = request
+                if len(body) > MAX_BODY_BYTES:
+                    status, payload = 413, {"error": "request body too large"}
+                    keep_alive = False
+                else:
+                    status, payload = await self.dispatch(method, path, body)
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes, bool]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, version = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise MalformedRequestError("bad request line") from None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, separator, value = line.decode("latin-1").partition(":")
+            if not separator:
+                raise MalformedRequestError("bad header line")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise MalformedRequestError("bad Content-Length") from None
+        if length < 0:
+            raise MalformedRequestError("bad Content-Length")
+        body = await reader.readexactly(min(length, MAX_BODY_BYTES + 1)) if length else b""
+        connection = headers.get("connection", "").lower()
+        # HTTP/1.1 keeps connections open unless asked not to; 1.0 only on request
+        keep_alive = connection != "close" if version.strip() == "HTTP/1.1" else connection == "keep-alive"
+        return method, path.split("?", 1)[0], headers, body, keep_alive
+
+    def _write_response(self, writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], keep_alive: bool):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == 503:
+            headers.append("Retry-After: 1")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        if path == "/health":
+            return 200, self.health()
+        if path != "/ask":
+            return 404, {"error": f"no route for {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        try:
+            request = json.loads(body or b"{}")
+            question = request["question"].strip()
+        except (ValueError, KeyError, AttributeError, TypeError):
+            return 400, {"error": 'expected JSON body {"question": "..."}'}
+        if not question:
+            return 400, {"error": "question is empty"}
+        category = request.get("category")
+        if category is not None and not isinstance(category, str):
+            return 400, {"error": "category must be a string"}
+
+        if self.inflight >= self.max_inflight:
+            self.rejected += 1
+            return 503, {"error": "server busy, retry later"}
+        self.inflight += 1
+        try:
+            response = await self.agent.aask(question, str(request.get("conversation_id") or "default"),
+                                             category)
+            payload = {
+                "answer": response["answer"],
+                "source_documents": [
+                    {"page_content": doc.page_content, "metadata": doc.metadata}
+                    for doc in response["source_documents"]
+                ],
+                "time_to_first_token": response["time_to_first_token"],
+                "response_time": response["response_time"],
+                "timings": response["timings"],
+            }
+        except QueueFullError:
+            self.rejected += 1
+            return 503, {"error": "server busy, retry later"}
+        except Exception as e:
+            # e.g. the embedding API or LLM failing; the client gets a 500, the server keeps serving
+            self.errors += 1
+            print(f"Error answering {question!r}: {e!r}")
+            return 500, {"error": "internal error answering the question"}
+        finally:
+            self.inflight -= 1
+        self.served += 1
+        return 200, payload
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "inflight": self.inflight,
+            "served": self.served,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "batching": self.batcher.stats() if self.batcher is not None else None,
+            "cache": self.agent.get_cache_stats(),
+        }
+
+
+def build_server(fake: bool = False, persist_dir: Optional[str] = None, window_ms: float = 5.0,
+                 max_batch: int = 64, max_queue: int = 1024, max_inflight: int = 512,
+                 rerank: Optional[str] = None, rerank_budget_ms: Optional[float] = None) -> HRAssistantServer:
+    """
+    Build the agent, index and server
+
+    Args:
+        fake: Use the offline fake embedding model and LLM (load testing)
+        persist_dir: Index directory; fake vectors get their own by default
+        window_ms: Micro-batching window for query embeddings
+        max_batch: Most queries embedded in one call
+        max_queue: Most queries waiting for an embedding call
+        max_inflight: Most questions answered at once
+        rerank: Reranker for retrieval results ("lexical" or "cross-encoder"), if any
+        rerank_budget_ms: Skip reranking for queries that have taken this long
+
+    Returns:
+        A server ready to ``serve``
+    """
+    load_dotenv()
+    if fake:
+        processor = DocumentProcessor(persist_dir=persist_dir or "faiss_index_fake",
+                                      embeddings=FakeEmbeddings(), cache_dir=None)
+        llm = FakeStreamingLLM()
+    else:
+        processor = DocumentProcessor(persist_dir=persist_dir or "faiss_index")
+        llm = None
+    vectorstore = processor.process_and_store()
+
+    batcher = MicroBatchingEmbeddings(processor.embeddings, window_ms=window_ms,
+                                      max_batch=max_batch, max_queue=max_queue)
+    # Question embeddings for retrieval go through the batcher too
+    vectorstore.embedding_function = batcher
+    agent = HRAssistantAgent(
+        llm=llm,
+        vectorstore=vectorstore,
+        lexical_index=processor.load_lexical_index(),
+        category_index=processor.load_category_index(),
+        fact_table=processor.load_fact_table(),
+        reranker=processor.create_reranker(rerank, budget_ms=rerank_budget_ms) if rerank else None,
+        semantic_cache=processor.create_semantic_cache(embeddings=batcher),
+        source_versions=processor.source_versions,
+        max_concurrent_model_calls=max_queue,
+    )
+    agent.intent_classifier = processor.load_intent_classifier(agent.intent_examples)
+    agent.index_version = processor.index_version
+    processor.rebuild_listeners.append(agent.on_index_rebuilt)
+    agent.initialize()
+    return HRAssistantServer(agent, batcher=batcher, max_inflight=max_inflight)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HR Assistant HTTP API")
+    parser.add_argument("--host", default=os.getenv("HR_ASSISTANT_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("HR_ASSISTANT_PORT", "8080")))
+    parser.add_argument("--fake", action="store_true", help="offline fake embeddings and LLM")
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-queue", type=int, default=1024)
+    parser.add_argument("--max-inflight", type=int, default=512)
+    parser.add_argument("--rerank", choices=["lexical", "cross-encoder"], default=None)
+    parser.add_argument("--rerank-budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    server = build_server(fake=args.fake, window_ms=args.window_ms, max_batch=args.max_batch,
+                          max_queue=args.max_queue, max_inflight=args.max_inflight,
+                          rerank=args.rerank, rerank_budget_ms=args.rerank_budget_ms)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server.agent.semantic_cache is not None:
+            server.agent.semantic_cache.save()
+
+
+if __name__ == "__main__":
+    main()